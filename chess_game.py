@@ -18,7 +18,6 @@ a2_minichess.py module from the Assignment 2 starter files:
     - ChessGame.is_red_move
     - ChessGame.get_winner
     - ChessGame._calculate_moves_for_board
-    - ChessGame._find_moves_in_direction
     - ChessGame._board_after_move
     - ChessGame._recalculate_valid_moves
     - _Piece class
@@ -33,6 +32,7 @@ from __future__ import annotations
 from typing import Optional
 import statistics
 import copy
+import random
 
 
 _MAX_MOVES = 200
@@ -49,27 +49,57 @@ PIECES = {('r', True): RED + '车' + BLACK, ('r', False): '车',
           ('c', True): RED + '炮' + BLACK, ('c', False): '炮',
           ('p', True): RED + '兵' + BLACK, ('p', False): '卒'}
 
+# The base value of each kind of piece, see calculate_absolute_points
+PIECE_VALUES = {'k': 10000, 'r': 900, 'c': 450, 'h': 400, 'e': 200, 'a': 200, 'p': 100}
+
+# Zobrist hashing: every (piece kind, colour) pair gets a random 64-bit key for each of the
+# 90 squares, and the hash of a position is the XOR of the keys of all pieces on the board
+# (also XOR-ed with ZOBRIST_RED_TO_MOVE when red is to move). The generator is seeded so that
+# every process computes the same keys.
+_ZOBRIST_RANDOM = random.Random(111)
+ZOBRIST_KEYS = {(kind, is_red): [[_ZOBRIST_RANDOM.getrandbits(64) for _ in range(0, 9)]
+                                 for _ in range(0, 10)]
+                for kind in 'rheakcp' for is_red in (True, False)}
+ZOBRIST_RED_TO_MOVE = _ZOBRIST_RANDOM.getrandbits(64)
+
+# Maps the Zobrist hash of a state to the valid moves of that state and the capturing moves
+# among them (see ChessGame.get_capture_moves), so that the moves of a state that is reached
+# again (e.g. by another order of moves, or by a deeper search of the same position) are not
+# calculated again. The cache is cleared whenever it grows beyond _MOVE_CACHE_SIZE states.
+# The lists of moves are shared, so they must never be mutated.
+_MOVE_CACHE_SIZE = 1 << 16
+_move_cache: dict[int, tuple[list[str], list[str]]] = {}
+
 
 class ChessGame:
     """A class representing a state of a game of Chinese Chess.
     """
     # Private Instance Attributes:
     #   - _board: a two-dimensional representation of a Chinese Chess board
-    #   - _valid_moves: a list of the valid moves of the current player
+    #   - _valid_moves: a list of the valid moves of the current player, or None if they
+    #                   have not been calculated yet (see get_valid_moves)
     #   - _is_red_active: a boolean representing whether red is the current player
     #   - _move_count: the number of moves that have been made in the current game
+    #   - _zobrist_hash: the Zobrist hash of the board and the active player, which is
+    #                    updated incrementally as moves are made
+    #   - _absolute_points: the absolute points of the board (see calculate_absolute_points),
+    #                       which are updated incrementally as moves are made
     #
     # Private Representation Invariants:
     #   - _board must be a legal Chinese Chess board (e.g. cannot contain 3 red elephants, etc.)
     #   - all moves in _valid_moves must be legal (e.g. cannot have a pawn like a horse, etc.)
     #   - 0 <= _move_count <= _MAX_MOVES
     _board: list[list[Optional[_Piece]]]
-    _valid_moves: list[str]
+    _valid_moves: Optional[list[str]]
     _is_red_active: bool
     _move_count: int
+    _zobrist_hash: int
+    _absolute_points: int
 
     def __init__(self, board: list[list[Optional[_Piece]]] = None,
-                 red_active: bool = True, move_count: int = 0) -> None:
+                 red_active: bool = True, move_count: int = 0,
+                 zobrist_hash: Optional[int] = None,
+                 absolute_points: Optional[int] = None) -> None:
         """The list representing the board is set up like this
         (where the number represents the index):
         0  丨----一----一----一----一----一----一----一----丨
@@ -95,6 +125,10 @@ class ChessGame:
 
         Note: the index numbering above is VERY different from what is used for the WXF notation,
         please use the conversion functions below to convert between the two.
+
+        zobrist_hash, if given, must be the Zobrist hash of board and red_active, and
+        absolute_points, if given, must be the absolute points of board; otherwise they are
+        computed from scratch.
         """
         if board is not None:
             self._board = board  # load the given board
@@ -132,6 +166,16 @@ class ChessGame:
         self._move_count = move_count
         self._valid_moves = []
 
+        if zobrist_hash is not None:
+            self._zobrist_hash = zobrist_hash
+        else:
+            self._zobrist_hash = _zobrist_hash_of_board(self._board, red_active)
+
+        if absolute_points is not None:
+            self._absolute_points = absolute_points
+        else:
+            self._absolute_points = calculate_absolute_points(self._board)
+
         self._recalculate_valid_moves()  # Ensure that self._valid_moves is up-to-date
 
     def __str__(self) -> str:
@@ -149,14 +193,19 @@ class ChessGame:
                 turn_message += "Red's turn.\n"
             else:
                 turn_message += "Black's turn.\n"
-            return turn_message + f'Valid moves: {self._valid_moves}'
+            return turn_message + f'Valid moves: {self.get_valid_moves()}'
         elif winner == 'Draw':  # the elif-branch and the else-branch return the result
             return 'Draw!'
         else:  # Red wins or black wins
             return f'{winner} wins!'
 
     def get_valid_moves(self) -> list[str]:
-        """Return a list of the valid moves for the active player."""
+        """Return a list of the valid moves for the active player.
+
+        The returned list may be shared with other games, so it must not be mutated.
+        """
+        if self._valid_moves is None:  # Not calculated since the last move made in place
+            self._recalculate_valid_moves()
         return self._valid_moves
 
     def make_move(self, move: str) -> None:
@@ -169,11 +218,12 @@ class ChessGame:
         move_lowered = move.lower()
 
         # Invalid move
-        if move_lowered not in self._valid_moves:
+        if move_lowered not in self.get_valid_moves():
             raise ValueError(f'Move "{move}" is not valid')
 
         # Update board
-        self._board = self._board_after_move(move_lowered, self._is_red_active)
+        self._board, self._zobrist_hash, self._absolute_points = \
+            self._board_after_move(move_lowered, self._is_red_active)
 
         self._is_red_active = not self._is_red_active  # Whoever just played won't play again
         self._move_count += 1
@@ -185,350 +235,339 @@ class ChessGame:
 
         If move is not a currently valid move, raise a ValueError.
         """
-        if move not in self._valid_moves:
+        if move not in self.get_valid_moves():
             raise ValueError(f'Move "{move}" is not valid')
 
         # Create a new instance of ChessGame accordingly then return it
-        return ChessGame(board=self._board_after_move(move, self._is_red_active),
-                         red_active=not self._is_red_active,
-                         move_count=self._move_count + 1)
+        board, zobrist_hash, absolute_points = self._board_after_move(move, self._is_red_active)
+        return ChessGame(board=board, red_active=not self._is_red_active,
+                         move_count=self._move_count + 1, zobrist_hash=zobrist_hash,
+                         absolute_points=absolute_points)
 
-    def is_red_move(self) -> bool:
-        """Return whether the red player is to move next."""
-        return self._is_red_active
+    def make_move_inplace(self, move: str) -> tuple:
+        """Make the given chess move on this game's board without copying the board, and return
+        an undo record that can be passed to undo_move to take the move back.
 
-    def get_winner(self) -> Optional[str]:
-        """Return the winner of the game (red or black) or 'draw' if the game ended in a draw.
-
-        Return None if the game is not over.
-        """
-        if self._move_count >= _MAX_MOVES:  # Exceeded maximum number of moves, so draw
-            return 'Draw'
-        elif all(self._board[y][x] != _Piece('k', True)
-                 for y in range(0, 10) for x in range(0, 9)):  # Cannot find red king
-            return 'Black'
-        elif all(self._board[y][x] != _Piece('k', False)
-                 for y in range(0, 10) for x in range(0, 9)):  # Cannot find black king
-            return 'Red'
-        else:  # Game not over yet
-            return None
-
-    def _calculate_moves_for_board(self, board: list[list[Optional[_Piece]]],
-                                   is_red_active: bool) -> list[str]:
-        """Return all possible moves on a given board with a given active player.
+        Unlike make_move, the move is not validated, which is why this method is meant for
+        searches that only make moves from self.get_valid_moves().
 
         Preconditions:
-            - board must be in a legal state (e.g. cannot have three red cannons, etc.)
-        """
-        moves = []  # accumulator
+            - move in self.get_valid_moves()
 
-        for pos in [(y, x) for y in range(0, 10) for x in range(0, 9)]:  # search entire board
-            piece = board[pos[0]][pos[1]]
-            if piece is None or piece.is_red != is_red_active:
-                continue  # Not your piece, can't do anything, so skip
-
-            if piece.kind == 'r':
-                moves += self._calculate_moves_for_chariot(board, pos)
-            elif piece.kind == 'h':
-                moves += self._calculate_moves_for_horse(board, pos)
-            elif piece.kind == 'e':
-                moves += self._calculate_moves_for_elephant(board, pos)
-            elif piece.kind == 'a':
-                moves += self._calculate_moves_for_advisor(board, pos)
-            elif piece.kind == 'k':
-                moves += self._calculate_moves_for_king(board, pos)
-            elif piece.kind == 'c':
-                moves += self._calculate_moves_for_cannon(board, pos)
-            else:  # kind == 'p'
-                moves += self._calculate_moves_for_pawn(board, pos)
+        >>> g = ChessGame()
+        >>> undo_record = g.make_move_inplace('c2.5')
+        >>> g.is_red_move()
+        False
+        >>> g.undo_move(undo_record)
+        >>> g.get_zobrist_hash() == ChessGame().get_zobrist_hash()
+        True
+        >>> g.get_valid_moves() == ChessGame().get_valid_moves()
+        True
+        """
+        start_pos = _wxf_to_index(self._board, move[0:2], self._is_red_active)
+        end_pos = _get_index_movement(self._board, move, self._is_red_active, start_pos)
+        captured = self._board[end_pos[0]][end_pos[1]]
+        undo_record = (start_pos, end_pos, captured, self._valid_moves, self._zobrist_hash,
+                       self._absolute_points)
+
+        self._zobrist_hash = self._hash_after_move(start_pos, end_pos)
+        self._absolute_points = self._points_after_move(start_pos, end_pos)
+        self._board[end_pos[0]][end_pos[1]] = self._board[start_pos[0]][start_pos[1]]
+        self._board[start_pos[0]][start_pos[1]] = None
+        self._is_red_active = not self._is_red_active
+        self._move_count += 1
+        # A search may not need the moves of this state at all (e.g. when the state is found
+        # in its transposition table), so only calculate them when asked for
+        self._valid_moves = None
 
-        return moves
+        return undo_record
 
-    def _calculate_moves_for_chariot(self, board: list[list[Optional[_Piece]]],
-                                     pos: tuple[int, int]) -> list[str]:
-        """Return all possible moves for the chariot at the given position
-        on a given board with a given active player.
+    def undo_move(self, undo_record: tuple) -> None:
+        """Take back the move made by make_move_inplace that returned undo_record.
 
         Preconditions:
-            - board must be in a legal state (e.g. cannot have three red cannons, etc.)
-            - a chariot is on the given position of the board
+            - undo_record was returned by the most recent call to self.make_move_inplace
+              whose move has not been taken back yet
         """
-        piece = board[pos[0]][pos[1]]
-        moves = []  # accumulator
-
-        moves += self._find_moves_in_direction(board, pos, piece.is_red, (1, 0))
-        moves += self._find_moves_in_direction(board, pos, piece.is_red, (-1, 0))
-        moves += self._find_moves_in_direction(board, pos, piece.is_red, (0, 1))
-        moves += self._find_moves_in_direction(board, pos, piece.is_red, (0, -1))
+        start_pos, end_pos, captured, valid_moves, zobrist_hash, absolute_points = undo_record
+        self._board[start_pos[0]][start_pos[1]] = self._board[end_pos[0]][end_pos[1]]
+        self._board[end_pos[0]][end_pos[1]] = captured
+        self._is_red_active = not self._is_red_active
+        self._move_count -= 1
+        self._valid_moves = valid_moves
+        self._zobrist_hash = zobrist_hash
+        self._absolute_points = absolute_points
+
+    def make_null_move(self) -> Optional[list[str]]:
+        """Pass the turn of the active player to the other player without moving any piece,
+        and return an undo record that can be passed to undo_null_move to take it back.
+
+        Passing is not allowed in Chinese Chess; this is only used by searches (see
+        ExploringPlayer._null_move_search in player.py).
 
-        return moves
+        >>> g = ChessGame()
+        >>> undo_record = g.make_null_move()
+        >>> g.is_red_move()
+        False
+        >>> g.undo_null_move(undo_record)
+        >>> g.get_zobrist_hash() == ChessGame().get_zobrist_hash()
+        True
+        """
+        undo_record = self._valid_moves
+        self._is_red_active = not self._is_red_active
+        self._zobrist_hash ^= ZOBRIST_RED_TO_MOVE
+        self._valid_moves = None  # Only calculated when asked for, see make_move_inplace
+        return undo_record
 
-    def _calculate_moves_for_horse(self, board: list[list[Optional[_Piece]]],
-                                   pos: tuple[int, int]) -> list[str]:
-        """Return all possible moves for the horse at the given position
-        on a given board with a given active player.
+    def undo_null_move(self, undo_record: Optional[list[str]]) -> None:
+        """Take back the pass made by make_null_move that returned undo_record.
 
         Preconditions:
-            - board must be in a legal state (e.g. cannot have three red cannons, etc.)
-            - a horse is on the given position of the board
+            - undo_record was returned by the most recent call to self.make_null_move,
+              and no moves have been made since then that have not been taken back
         """
-        piece = board[pos[0]][pos[1]]
-        moves = []  # accumulator
+        self._is_red_active = not self._is_red_active
+        self._zobrist_hash ^= ZOBRIST_RED_TO_MOVE
+        self._valid_moves = undo_record
 
-        # The if-statements are 'horse-leg' condition checks
-        if pos[0] != 0 and board[pos[0] - 1][pos[1]] is None:
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (-2, 1), limit=1)
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (-2, -1), limit=1)
-        if pos[0] != 9 and board[pos[0] + 1][pos[1]] is None:
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (2, 1), limit=1)
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (2, -1), limit=1)
-        if pos[1] != 0 and board[pos[0]][pos[1] - 1] is None:
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (1, -2), limit=1)
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (-1, -2), limit=1)
-        if pos[1] != 8 and board[pos[0]][pos[1] + 1] is None:
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (1, 2), limit=1)
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (-1, 2), limit=1)
-
-        return moves
+    def is_red_move(self) -> bool:
+        """Return whether the red player is to move next."""
+        return self._is_red_active
 
-    def _calculate_moves_for_elephant(self, board: list[list[Optional[_Piece]]],
-                                      pos: tuple[int, int]) -> list[str]:
-        """Return all possible moves for the elephant at the given position
-        on a given board with a given active player.
+    def get_move_pieces(self, move: str) -> tuple[_Piece, Optional[_Piece]]:
+        """Return the piece that makes the given move and the piece captured by the move,
+        which is None if the move does not capture anything.
 
         Preconditions:
-            - board must be in a legal state (e.g. cannot have three red cannons, etc.)
-            - an elephant is on the given position of the board
-        """
-        piece = board[pos[0]][pos[1]]
-        moves = []  # accumulator
+            - move in self.get_valid_moves()
 
-        if pos[0] not in {0, 5}:  # Can move towards black base
-            # The if-statements are 'elephant-leg' condition checks
-            if pos[1] != 0 and board[pos[0] - 1][pos[1] - 1] is None:
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (-2, -2), limit=1)
-            if pos[1] != 8 and board[pos[0] - 1][pos[1] + 1] is None:
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (-2, 2), limit=1)
-        if pos[0] not in {4, 9}:  # Can move towards red base
-            if pos[1] != 0 and board[pos[0] + 1][pos[1] - 1] is None:
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (2, -2), limit=1)
-            if pos[1] != 8 and board[pos[0] + 1][pos[1] + 1] is None:
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (2, 2), limit=1)
+        >>> g = ChessGame()
+        >>> g.get_move_pieces('c2+7') == (_Piece('c', True), _Piece('h', False))
+        True
+        >>> g.get_move_pieces('c2.5')[1] is None
+        True
+        """
+        start_pos = _wxf_to_index(self._board, move[0:2], self._is_red_active)
+        end_pos = _get_index_movement(self._board, move, self._is_red_active, start_pos)
+        return self._board[start_pos[0]][start_pos[1]], self._board[end_pos[0]][end_pos[1]]
 
-        return moves
+    def get_capture_moves(self) -> list[str]:
+        """Return the valid moves for the active player that capture a piece, where the moves
+        capturing the most valuable piece come first and, among those, the moves made by the
+        least valuable piece come first.
 
-    def _calculate_moves_for_advisor(self, board: list[list[Optional[_Piece]]],
-                                     pos: tuple[int, int]) -> list[str]:
-        """Return all possible moves for the advisor at the given position
-        on a given board with a given active player.
+        The returned list may be shared with other games, so it must not be mutated.
 
-        Preconditions:
-            - board must be in a legal state (e.g. cannot have three red cannons, etc.)
-            - an advisor is on the given position of the board
+        >>> g = ChessGame()
+        >>> g.get_capture_moves()
+        ['c8+7', 'c2+7']
         """
-        piece = board[pos[0]][pos[1]]
-        moves = []  # accumulator
+        cached_moves = _move_cache.get(self._zobrist_hash)
+        if cached_moves is None:  # The captures are found along with the valid moves
+            self._recalculate_valid_moves()
+            cached_moves = _move_cache[self._zobrist_hash]
+        return cached_moves[1]
 
-        # Movement restricted in palace
-        if pos[0] not in {2, 9}:
-            if pos[1] != 3:
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (1, -1), limit=1)
-            if pos[1] != 5:
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (1, 1), limit=1)
-        if pos[0] not in {0, 7}:
-            if pos[1] != 3:
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (-1, -1), limit=1)
-            if pos[1] != 5:
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (-1, 1), limit=1)
+    def get_absolute_points(self) -> int:
+        """Return the absolute points of the current board, which is equal to
+        calculate_absolute_points(self.get_board()) but does not need to examine the board.
 
-        return moves
-
-    def _calculate_moves_for_king(self, board: list[list[Optional[_Piece]]],
-                                  pos: tuple[int, int]) -> list[str]:
-        """Return all possible moves for the king at the given position
-        on a given board with a given active player.
-
-        Preconditions:
-            - board must be in a legal state (e.g. cannot have three red cannons, etc.)
-            - a king is on the given position of the board
+        >>> g = ChessGame()
+        >>> g.make_move('c2+7')
+        >>> g.get_absolute_points() == calculate_absolute_points(g.get_board())
+        True
         """
-        piece = board[pos[0]][pos[1]]
-        moves = []  # accumulator
+        return self._absolute_points
 
-        # Movement restricted in palace
-        if pos[0] not in {2, 9}:
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (1, 0), limit=1)
-        if pos[0] not in {0, 7}:
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (-1, 0), limit=1)
-        if pos[1] != 3:
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (0, -1), limit=1)
-        if pos[1] != 5:
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (0, 1), limit=1)
-        # Confront check
-        if piece.is_red:
-            king_row = pos[0] - 1
-            while king_row >= 0:  # Search 'upwards' (index going down)
-                if board[king_row][pos[1]] is not None and \
-                        board[king_row][pos[1]].kind == 'k':  # Can confront other king
-                    moves.append(_get_wxf_movement(board, pos, (king_row, pos[1]), piece.is_red))
-                elif board[king_row][pos[1]] is not None:  # Not confronting other king
-                    break
-                king_row -= 1  # Search the place right above in the next iteration
-        else:  # not is_red
-            king_row = pos[0] + 1
-            while king_row <= 9:  # Search 'downwards' (index going up)
-                if board[king_row][pos[1]] is not None and \
-                        board[king_row][pos[1]].kind == 'k':  # Can confront other king
-                    moves.append(_get_wxf_movement(board, pos, (king_row, pos[1]), piece.is_red))
-                elif board[king_row][pos[1]] is not None:
-                    break
-                king_row += 1  # Search the place right below in the next iteration
+    def get_zobrist_hash(self) -> int:
+        """Return the Zobrist hash of the current board and active player.
 
-        return moves
+        Note that the move count is not part of the hash.
 
-    def _calculate_moves_for_cannon(self, board: list[list[Optional[_Piece]]],
-                                    pos: tuple[int, int]) -> list[str]:
-        """Return all possible moves for the cannon at the given position
-        on a given board with a given active player.
+        >>> g = ChessGame()
+        >>> g.make_move('h2+3')
+        >>> g.make_move('h8+7')
+        >>> g.make_move('h8+7')
+        >>> g.make_move('h2+3')
+        >>> g.get_zobrist_hash() == ChessGame(g.get_board()).get_zobrist_hash()
+        True
+        >>> g.get_zobrist_hash() == ChessGame().get_zobrist_hash()
+        False
+        """
+        return self._zobrist_hash
 
-        Note: the mechanism for cannon firing is written in ChessGame._find_moves_in_direction.
+    def get_winner(self) -> Optional[str]:
+        """Return the winner of the game (red or black) or 'draw' if the game ended in a draw.
 
-        Preconditions:
-            - board must be in a legal state (e.g. cannot have three red cannons, etc.)
-            - a cannon is on the given position of the board
+        Return None if the game is not over.
         """
-        piece = board[pos[0]][pos[1]]
-        moves = []  # accumulator
+        if self._move_count >= _MAX_MOVES:  # Exceeded maximum number of moves, so draw
+            return 'Draw'
+
+        # A king never leaves its palace, so only the squares of the palaces are searched
+        kings = [piece.is_red for y in (0, 1, 2, 7, 8, 9) for piece in self._board[y][3:6]
+                 if piece is not None and piece.kind == 'k']
+        if True not in kings:  # Cannot find red king
+            return 'Black'
+        elif False not in kings:  # Cannot find black king
+            return 'Red'
+        else:  # Game not over yet
+            return None
 
-        moves += self._find_moves_in_direction(board, pos, piece.is_red, (1, 0), capture=False)
-        moves += self._find_moves_in_direction(board, pos, piece.is_red, (-1, 0), capture=False)
-        moves += self._find_moves_in_direction(board, pos, piece.is_red, (0, 1), capture=False)
-        moves += self._find_moves_in_direction(board, pos, piece.is_red, (0, -1), capture=False)
+    def _calculate_moves_for_board(self, board: list[list[Optional[_Piece]]],
+                                   is_red_active: bool,
+                                   captures: Optional[list[tuple[int, int, str]]] = None) \
+            -> list[str]:
+        """Return all possible moves on a given board with a given active player.
 
-        return moves
+        If captures is given, also append (-victim value, attacker value, move) to captures for
+        every move that captures a piece, where the values are from PIECE_VALUES.
 
-    def _calculate_moves_for_pawn(self, board: list[list[Optional[_Piece]]],
-                                  pos: tuple[int, int]) -> list[str]:
-        """Return all possible moves for the pawn at the given position
-        on a given board with a given active player.
+        The squares each piece can move to are looked up in _PIECE_STEPS and _PIECE_RAYS,
+        which already take the bounds of the board, the palaces and the river into account,
+        so only the other pieces on the board need to be checked here.
 
         Preconditions:
             - board must be in a legal state (e.g. cannot have three red cannons, etc.)
-            - a pawn is on the given position of the board
         """
-        piece = board[pos[0]][pos[1]]
         moves = []  # accumulator
 
-        if piece.is_red:
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (-1, 0), limit=1)
-            if pos[0] <= 4:  # Crossed the river, so can move horizontally
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (0, 1), limit=1)
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (0, -1), limit=1)
-        else:  # not is_red
-            moves += self._find_moves_in_direction(board, pos, piece.is_red, (1, 0), limit=1)
-            if pos[0] >= 5:  # Crossed the river, so can move horizontally
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (0, 1), limit=1)
-                moves += self._find_moves_in_direction(board, pos, piece.is_red, (0, -1), limit=1)
+        # Search the entire board once for your pieces, and record the rows of your pieces of
+        # each type in each column, from which the wxf notation of the pieces is found
+        pieces = []
+        column_rows = {}
+        for y, row in enumerate(board):
+            for x, piece in enumerate(row):
+                if piece is not None and piece.is_red == is_red_active:
+                    pieces.append((y, x, piece))
+                    column_rows.setdefault((piece.kind, x), []).append(y)
+
+        for y, x, piece in pieces:
+            if piece.kind in {'r', 'c'}:
+                targets = _find_ray_targets(board, _PIECE_RAYS[is_red_active][y][x],
+                                            is_red_active, piece.kind == 'c')
+            else:
+                steps = _PIECE_STEPS[(piece.kind, is_red_active)][y][x]
+                targets = _find_step_targets(board, steps, is_red_active)
+                if piece.kind == 'k':
+                    targets += self._find_confront_target(board, (y, x), is_red_active)
+
+            if not targets:
+                continue  # No moves, so there is no need to find the wxf notation
+
+            # The wxf notation of this piece is the start of all its moves
+            rows = column_rows[(piece.kind, x)]
+            move_start = _piece_wxf(piece.kind, x, len(rows), rows.index(y), is_red_active)
+            for end_y, end_x, movement in targets:
+                moves.append(move_start + movement)
+                captured = board[end_y][end_x]
+                if captures is not None and captured is not None:
+                    captures.append((-PIECE_VALUES[captured.kind], PIECE_VALUES[piece.kind],
+                                     move_start + movement))
 
         return moves
 
-    def _find_moves_in_direction(self, board: list[list[Optional[_Piece]]],
-                                 pos: tuple[int, int], is_red: bool, direction: tuple[int, int],
-                                 limit: int = None, capture: bool = None) -> list[str]:
-        """Find valid moves moving in a given direction from a certain position.
-
-        capture: True if must capture, False if must not capture, None otherwise.
+    def _find_confront_target(self, board: list[list[Optional[_Piece]]], pos: tuple[int, int],
+                              is_red: bool) -> list[tuple[int, int, str]]:
+        """Return the target (y, x, movement) of the king at the given position capturing the
+        other king by 'flying' to it, in a list, or an empty list if the kings do not face each
+        other with nothing between them.
 
         >>> g = ChessGame()
-        >>> g._find_moves_in_direction(g._board, (7, 1), True, (-1, 0), capture=False)
-        ['c8+1', 'c8+2', 'c8+3', 'c8+4', 'c8+7']
-        >>> g._find_moves_in_direction(g._board, (7, 1), True, (0, 1), capture=False)
-        ['c8.7', 'c8.6', 'c8.5', 'c8.4', 'c8.3']
-        >>> g._find_moves_in_direction(g._board, (0, 0), False, (1, 0), capture=True)
-        ['r1+1', 'r1+2']
-        >>> g._find_moves_in_direction(g._board, (6, 2), True, (-1, 0), capture=True, limit=1)
-        ['p7+1']
+        >>> g._find_confront_target(g.get_board(), (9, 4), True)
+        []
         """
-        moves = []  # accumulator
-
-        kind = board[pos[0]][pos[1]].kind
-        stop = False
-        i = 1
-        while not stop:  # Keep searching to the given direction
-            # Add one step towards the given direction
-            y, x = pos[0] + direction[0] * i, pos[1] + direction[1] * i
-
-            if x < 0 or y < 0 or x > 8 or y > 9:
-                break  # Out of bounds
-
-            contents = board[y][x]  # What's currently on the spot being searched
-
-            # Store this move first, will later decide whether to add this move to the accumulator
-            move = _get_wxf_movement(board, pos, (y, x), is_red)
-
-            if contents is not None:  # the spot being searched contains another piece
-                stop = True  # Can't move any further; this is the last iteration of the whlie loop
-                if kind == 'c':  # Check if this cannon can be fired in the given direction
-                    moves += self._check_cannon_fire(board, pos, is_red, direction, i)
-
-                # If this piece is allowed to capture, then add the move to the accumulator
-                if contents.is_red != is_red and capture is not False:
-                    moves.append(move)
-            else:  # Found an empty square, we can go there, so add the move to the accumulator
-                moves.append(move)
-
-            i += 1  # Search for the next spot in the next iteration of the while loop
-
-            # For pieces that can only move by x steps, stop when the step limit is reached
-            if limit is not None and i > limit:
-                stop = True
-
-        return moves
-
-    def _check_cannon_fire(self, board: list[list[Optional[_Piece]]], pos: tuple[int, int],
-                           is_red: bool, direction: tuple[int, int], i: int) -> list:
-        """Helper function of the above function that checks whether a cannon can be fired
-        in the given direction.
-
-        Preconditions:
-            - There must be a cannon at the given pos of the board
-            - Cannon's colour must be consistent with is_red
-        """
-        i += 1
-        y, x = pos[0] + direction[0] * i, pos[1] + direction[1] * i
-        while 0 <= x <= 8 and 0 <= y <= 9:  # only check non-out-of-bound locations
-            if board[y][x] is not None and board[y][x].is_red == is_red:
-                # Cannot fire cannon since it's blocked by an ally piece
-                return []
-            if board[y][x] is not None and board[y][x].is_red != is_red:
-                # Can fire cannon because found an opponent piece
-                return [_get_wxf_movement(board, pos, (y, x), is_red)]
-            i += 1
-            y, x = pos[0] + direction[0] * i, pos[1] + direction[1] * i
-
-        return []  # Cannot fire cannon because nothing can be hit
+        forward_ray = _PIECE_RAYS[is_red][pos[0]][pos[1]][1 if is_red else 0]
+        for y, x, movement in forward_ray:
+            if board[y][x] is not None:  # The first piece in front of the king
+                if board[y][x].kind == 'k':  # Can confront other king
+                    return [(y, x, movement)]
+                return []  # Not confronting other king
+        return []
 
     def get_board(self) -> list[list[Optional[_Piece]]]:
         """Return the board representation."""
         return self._board
 
-    def _board_after_move(self, move: str, is_red: bool) -> list[list[Optional[_Piece]]]:
-        """Return a copy of self._board representing the state of the board after making move.
+    def _board_after_move(self, move: str,
+                          is_red: bool) -> tuple[list[list[Optional[_Piece]]], int, int]:
+        """Return a copy of self._board representing the state of the board after making move,
+        along with the Zobrist hash and the absolute points of that state.
         """
         board_copy = copy.deepcopy(self._board)  # Deepcopy the board (no aliasing to self._board)
 
         start_pos = _wxf_to_index(self._board, move[0:2], is_red)  # Obtain which piece is moving
-        end_pos = _get_index_movement(self._board, move, is_red)  # Obtain to where the piece moves
+        # Obtain to where the piece moves
+        end_pos = _get_index_movement(self._board, move, is_red, start_pos)
+
+        zobrist_hash = self._hash_after_move(start_pos, end_pos)
+        absolute_points = self._points_after_move(start_pos, end_pos)
 
         # The destination is now occupied by the piece moving
         board_copy[end_pos[0]][end_pos[1]] = board_copy[start_pos[0]][start_pos[1]]
         board_copy[start_pos[0]][start_pos[1]] = None  # The starting spot is now empty
 
-        return board_copy
+        return board_copy, zobrist_hash, absolute_points
+
+    def _hash_after_move(self, start_pos: tuple[int, int], end_pos: tuple[int, int]) -> int:
+        """Return the Zobrist hash of the state after the active player moves the piece at
+        start_pos to end_pos, computed from the hash of the current state.
+
+        Preconditions:
+            - moving the piece at start_pos to end_pos is a valid move
+        """
+        # The moving piece leaves start_pos, any captured piece leaves end_pos,
+        # the moving piece arrives at end_pos, and the active player changes
+        piece = self._board[start_pos[0]][start_pos[1]]
+        captured = self._board[end_pos[0]][end_pos[1]]
+        keys = ZOBRIST_KEYS[(piece.kind, piece.is_red)]
+        zobrist_hash = self._zobrist_hash ^ keys[start_pos[0]][start_pos[1]] \
+            ^ keys[end_pos[0]][end_pos[1]] ^ ZOBRIST_RED_TO_MOVE
+        if captured is not None:
+            zobrist_hash ^= ZOBRIST_KEYS[(captured.kind, captured.is_red)][end_pos[0]][end_pos[1]]
+        return zobrist_hash
+
+    def _points_after_move(self, start_pos: tuple[int, int], end_pos: tuple[int, int]) -> int:
+        """Return the absolute points of the board after the active player moves the piece at
+        start_pos to end_pos, computed from the absolute points of the current board.
+
+        Preconditions:
+            - moving the piece at start_pos to end_pos is a valid move
+        """
+        # Only the moving piece and the captured piece (if any) change their points
+        piece = self._board[start_pos[0]][start_pos[1]]
+        captured = self._board[end_pos[0]][end_pos[1]]
+        table = _PIECE_SQUARE_POINTS[(piece.kind, piece.is_red)]
+        absolute_points = self._absolute_points - table[start_pos[0]][start_pos[1]] \
+            + table[end_pos[0]][end_pos[1]]
+        if captured is not None:
+            absolute_points -= \
+                _PIECE_SQUARE_POINTS[(captured.kind, captured.is_red)][end_pos[0]][end_pos[1]]
+        return absolute_points
 
     def _recalculate_valid_moves(self) -> None:
         """Update the valid moves for this game board."""
-        self._valid_moves = self._calculate_moves_for_board(self._board, self._is_red_active)
+        cached_moves = _move_cache.get(self._zobrist_hash)
+        if cached_moves is None:  # This state has not been seen recently
+            captures = []
+            moves = self._calculate_moves_for_board(self._board, self._is_red_active, captures)
+            captures.sort(key=lambda capture: capture[:2])  # sort is stable, keep tied order
+            cached_moves = (moves, [capture[2] for capture in captures])
+            if len(_move_cache) >= _MOVE_CACHE_SIZE:
+                _move_cache.clear()
+            _move_cache[self._zobrist_hash] = cached_moves
+        self._valid_moves = cached_moves[0]
+
+
+def _zobrist_hash_of_board(board: list[list[Optional[_Piece]]], red_active: bool) -> int:
+    """Return the Zobrist hash of the given board with the given active player."""
+    zobrist_hash = ZOBRIST_RED_TO_MOVE if red_active else 0
+    for y in range(0, 10):
+        for x in range(0, 9):
+            piece = board[y][x]
+            if piece is not None:
+                zobrist_hash ^= ZOBRIST_KEYS[(piece.kind, piece.is_red)][y][x]
+    return zobrist_hash
 
 
 def print_board(board: list[list[Optional[_Piece]]]) -> None:
@@ -590,10 +629,12 @@ def _print_piece(board: list[list[Optional[_Piece]]], y: int, x: int) -> str:
             return '十'  # if it is inside the board
 
 
-def _get_index_movement(board: list[list[Optional[_Piece]]],
-                        move: str, is_red: bool) -> tuple[int, int]:
+def _get_index_movement(board: list[list[Optional[_Piece]]], move: str, is_red: bool,
+                        start: Optional[tuple[int, int]] = None) -> tuple[int, int]:
     """Return the end position of a move, given the move in wxf notation and the colour.
 
+    start is the position of the moving piece, if it is already known.
+
     Preconditions:
         - The move given in wxf notation is legal
 
@@ -611,8 +652,12 @@ def _get_index_movement(board: list[list[Optional[_Piece]]],
     (7, 0)
     >>> _get_index_movement(board, 'c8-1', False)
     (1, 7)
+    >>> _get_index_movement(board, 'c8-1', False, (2, 7))
+    (1, 7)
     """
-    y, x = _wxf_to_index(board, move[0:2], is_red)  # the initial coordinate of the piece
+    if start is None:
+        start = _wxf_to_index(board, move[0:2], is_red)
+    y, x = start  # the initial coordinate of the piece
     sign = move[2]  # either + or - o
     # if the move is horizontally, then it represents the final position of x coords.
     # if the move is vertically, it represents the piece move by how much
@@ -658,9 +703,12 @@ def _get_index_movement(board: list[list[Optional[_Piece]]],
 
 
 def _get_wxf_movement(board: list[list[Optional[_Piece]]],
-                      start: tuple[int, int], end: tuple[int, int], is_red: bool) -> str:
+                      start: tuple[int, int], end: tuple[int, int], is_red: bool,
+                      move_start: Optional[str] = None) -> str:
     """Return the move in wxf notation given the colour, start coordinates, and end coordinates.
 
+    move_start is the wxf notation of the piece at start (e.g. 'c2'), if it is already known.
+
     Preconditions:
         - start represents a piece whose colour is consistent with is_red
         - the move from start to end is legal
@@ -679,8 +727,11 @@ def _get_wxf_movement(board: list[list[Optional[_Piece]]],
     'r9+2'
     >>> _get_wxf_movement(board, (2, 7), (1, 7), False)
     'c8-1'
+    >>> _get_wxf_movement(board, (2, 7), (1, 7), False, 'c8')
+    'c8-1'
     """
-    move_start = _index_to_wxf(board, start, is_red)
+    if move_start is None:
+        move_start = _index_to_wxf(board, start, is_red)
 
     if start[0] == end[0]:  # Horizontal movement
         if is_red:
@@ -733,17 +784,17 @@ def _wxf_to_index(board: list[list[Optional[_Piece]]], piece: str, is_red: bool)
         else:  # not is_red
             x = int(location) - 1  # Convert between wxf coords and index coords
 
-        y = 0
-        # Find the piece in the given column (fixing the x-value)
-        while y <= 9 and board[y][x] != _Piece(piece_type, is_red):
-            y += 1
+        # Find the piece in the given column (fixing the x-value), comparing the attributes
+        # directly since this runs for every move of every searched position
+        for y in range(0, 10):
+            square = board[y][x]
+            if square is not None and square.kind == piece_type and square.is_red == is_red:
+                return (y, x)  # Piece is found, return it
 
-        if y > 9:  # Out of bound, piece not found
-            print_board(board)
-            print(piece)
-            raise ValueError('Invalid piece')
-        else:  # Piece is found, return it
-            return (y, x)
+        # Out of bound, piece not found
+        print_board(board)
+        print(piece)
+        raise ValueError('Invalid piece')
 
 
 def _wxf_to_index_two_aligned(board: list[list[Optional[_Piece]]], piece: str,
@@ -761,16 +812,10 @@ def _wxf_to_index_two_aligned(board: list[list[Optional[_Piece]]], piece: str,
     piece_type = piece_lower[0]  # Extract first letter
     location = piece_lower[1]  # Extract the second symbol
 
-    y, x = 0, 0
-
-    locations_so_far = []  # Accumulator
-    while y <= 9:  # Collect all the pieces of the given type
-        if board[y][x] == _Piece(piece_type, is_red):
-            locations_so_far.append((y, x))
-        x += 1
-        if x >= 9:  # Move onto the next row, reset to the first column
-            y += 1
-            x = 0
+    # Collect all the pieces of the given type
+    locations_so_far = [(y, x) for y in range(0, 10) for x in range(0, 9)
+                        if board[y][x] is not None and board[y][x].kind == piece_type
+                        and board[y][x].is_red == is_red]
 
     coord1, coord2 = (), ()
     out = False
@@ -810,16 +855,10 @@ def _wxf_to_index_more_than_three_aligned(board: list[list[Optional[_Piece]]], p
     piece_lower = piece.lower()  # Lowercase the wxf notation of the piece for consistency
     piece_type = piece_lower[0]  # Extract first number
 
-    y, x = 0, 0
-
-    locations_so_far = []  # Accumulator
-    while y <= 9:  # Collect all the pieces of the given type
-        if board[y][x] == _Piece('p', is_red):
-            locations_so_far.append((y, x))
-        x += 1
-        if x >= 9:  # Move onto the next row, reset to the first column
-            y += 1
-            x = 0
+    # Collect all the pieces of the given type
+    locations_so_far = [(y, x) for y in range(0, 10) for x in range(0, 9)
+                        if board[y][x] is not None and board[y][x].kind == 'p'
+                        and board[y][x].is_red == is_red]
 
     x_values = [l[1] for l in locations_so_far]
     # There is at most 5 pieces of the same kind, so to get the 3+ in the same column,
@@ -856,30 +895,46 @@ def _index_to_wxf(board: list[list[Optional[_Piece]]], pos: tuple[int, int], is_
     piece_type = piece.kind
     x = pos[1]
 
-    # Search for all pieces present in the column
-    pieces = []
-    y = 0
-    while y <= 9:
-        if board[y][x] == _Piece(piece_type, is_red):
-            pieces.append((y, x))
-        y += 1
-
-    if len(pieces) == 1:  # there is only one piece with the same type
+    # Search for all pieces present in the column, counting those above the given piece.
+    # Only the row of each square is looked up, since the column is fixed.
+    count, above = 0, 0
+    for y, row in enumerate(board):
+        other = row[x]
+        if other is not None and other.kind == piece_type and other.is_red == is_red:
+            count += 1
+            if y < pos[0]:
+                above += 1
+
+    return _piece_wxf(piece_type, x, count, above, is_red)
+
+
+def _piece_wxf(piece_type: str, x: int, count: int, above: int, is_red: bool) -> str:
+    """Return the wxf notation of a piece of the given type and colour in column x, given
+    that count pieces of the same type and colour are in that column (including this piece),
+    and above of them are in a smaller row than this piece.
+
+    >>> _piece_wxf('c', 7, 1, 0, True)
+    'c2'
+    >>> _piece_wxf('r', 0, 2, 0, False)
+    'r-'
+    >>> _piece_wxf('p', 4, 3, 1, True)
+    '25'
+    """
+    if count == 1:  # there is only one piece with the same type
         if is_red:
             return piece_type + str(9 - x)
         else:  # not is_red
             return piece_type + str(x + 1)
-    elif len(pieces) == 2:  # there are 2 pieces on the board with the same type
-        if (is_red and pieces.index((pos[0], pos[1])) == 1) \
-                or (not is_red and pieces.index((pos[0], pos[1])) == 0):
+    elif count == 2:  # there are 2 pieces on the board with the same type
+        if (is_red and above == 1) or (not is_red and above == 0):
             return piece_type + '-'
         else:
             return piece_type + '+'
     else:
         if is_red:
-            return str(pieces.index((pos[0], pos[1])) + 1) + str(9 - x)
+            return str(above + 1) + str(9 - x)
         else:  # not is_red
-            return str(len(pieces) - pieces.index((pos[0], pos[1]))) + str(x + 1)
+            return str(count - above) + str(x + 1)
 
 
 def calculate_absolute_points(board: list[list[Optional[_Piece]]]) -> int:
@@ -911,28 +966,203 @@ def calculate_absolute_points(board: list[list[Optional[_Piece]]]) -> int:
         - board is in the format as defined previously.
     """
     points_so_far = 0
-    for pos in [(y, x) for y in range(0, 10) for x in range(0, 9)]:
-        piece = board[pos[0]][pos[1]]
-        if piece is None:
-            continue
-        else:
-            if piece.kind == 'p':
-                points_so_far += _absolute_pawn(board, pos)
-            elif piece.kind == 'h':
-                points_so_far += _absolute_horse(board, pos)
-            elif piece.kind == 'e':
-                points_so_far += _absolute_elephant(board, pos)
-            elif piece.kind == 'c':
-                points_so_far += _absolute_cannon(board, pos)
-            elif piece.kind == 'r':
-                points_so_far += _absolute_chariot(board, pos)
-            elif piece.kind == 'k':
-                points_so_far += _absolute_king(board, pos)
-            else:  # piece.kind == 'a'
-                points_so_far += _absolute_advisor(board, pos)
+    for y in range(0, 10):
+        row = board[y]
+        for x in range(0, 9):
+            piece = row[x]
+            if piece is not None:
+                points_so_far += _PIECE_SQUARE_POINTS[(piece.kind, piece.is_red)][y][x]
     return points_so_far
 
 
+def _calculate_piece_square_points() -> dict[tuple[str, bool], list[list[int]]]:
+    """Return a mapping from each (kind, is_red) pair of a piece to a table of the absolute points
+    of that piece on each position of the board, where the points are as defined by the
+    _absolute_<kind> functions below.
+
+    Since the points of a piece only depend on its kind, colour, and position, this table is
+    computed once, and calculate_absolute_points only looks it up.
+    """
+    absolute_functions = {'p': _absolute_pawn, 'h': _absolute_horse, 'e': _absolute_elephant,
+                          'c': _absolute_cannon, 'r': _absolute_chariot, 'k': _absolute_king,
+                          'a': _absolute_advisor}
+    tables = {}
+    for kind, absolute_function in absolute_functions.items():
+        for is_red in (True, False):
+            table = [[0] * 9 for _ in range(0, 10)]
+            for y in range(0, 10):
+                for x in range(0, 9):
+                    board = [[None] * 9 for _ in range(0, 10)]  # only this piece on the board
+                    board[y][x] = _Piece(kind, is_red)
+                    table[y][x] = absolute_function(board, (y, x))
+            tables[(kind, is_red)] = table
+    return tables
+
+
+def _find_step_targets(board: list[list[Optional[_Piece]]],
+                       steps: list[tuple[Optional[tuple[int, int]], int, int, str]],
+                       is_red: bool) -> list[tuple[int, int, str]]:
+    """Return the targets (y, x, movement) of the steps from _PIECE_STEPS of a piece of the
+    given colour that are possible on board: the leg of the step is empty, and the target is
+    empty or holds a piece of the opponent.
+    """
+    return [(y, x, movement) for leg, y, x, movement in steps
+            if (leg is None or board[leg[0]][leg[1]] is None)
+            and (board[y][x] is None or board[y][x].is_red != is_red)]
+
+
+def _find_ray_targets(board: list[list[Optional[_Piece]]],
+                      rays: list[list[tuple[int, int, str]]], is_red: bool,
+                      is_cannon: bool) -> list[tuple[int, int, str]]:
+    """Return the targets (y, x, movement) of the chariot (or the cannon if is_cannon) of the
+    given colour with the given rays from _PIECE_RAYS that are possible on board.
+
+    Both pieces move to every empty square of a ray up to the first piece on it. A chariot can
+    capture that piece if it belongs to the opponent, whereas a cannon uses it as a screen to
+    fire at the next piece on the ray, which it can capture if it belongs to the opponent.
+    """
+    targets = []  # accumulator
+    for ray in rays:
+        for i in range(0, len(ray)):
+            y, x, movement = ray[i]
+            if board[y][x] is None:  # Found an empty square, we can go there
+                targets.append(ray[i])
+                continue
+
+            if not is_cannon and board[y][x].is_red != is_red:
+                targets.append(ray[i])  # The chariot captures the opponent piece
+            elif is_cannon:  # Check if this cannon can be fired over the screen
+                for target in ray[i + 1:]:
+                    target_piece = board[target[0]][target[1]]
+                    if target_piece is not None:
+                        if target_piece.is_red != is_red:  # Can hit an opponent piece
+                            targets.append(target)
+                        break  # Otherwise, blocked by an ally piece
+            break  # Can't move any further along this ray
+    return targets
+
+
+def _calculate_piece_steps() -> dict[tuple[str, bool],
+                                     list[list[list[tuple[Optional[tuple[int, int]],
+                                                          int, int, str]]]]]:
+    """Return a mapping from each (kind, is_red) pair of a horse, elephant, advisor, king, or
+    pawn to a table of the steps that piece can make from each position of the board, if the
+    board has no other pieces.
+
+    A step is (leg, y, x, movement), where (y, x) is the target of the step, movement is the
+    wxf notation of the step without the piece (e.g. '+3'), and leg is the position that has
+    to be empty for the step to be possible (the 'horse leg' or the 'elephant eye'), or None.
+
+    >>> steps = _calculate_piece_steps()
+    >>> steps[('h', True)][9][1]
+    [((8, 1), 7, 2, '+7'), ((8, 1), 7, 0, '+9'), ((9, 2), 8, 3, '+6')]
+    >>> steps[('p', False)][5][0]
+    [(None, 6, 0, '+1'), (None, 5, 1, '.2')]
+    """
+    tables = {}
+    for kind in 'heakp':
+        for is_red in (True, False):
+            tables[(kind, is_red)] = [
+                [[(leg, end[0], end[1], _get_wxf_movement([], (y, x), end, is_red, ''))
+                  for leg, end in _piece_steps(kind, is_red, (y, x))
+                  if 0 <= end[0] <= 9 and 0 <= end[1] <= 8]  # Only the steps within bounds
+                 for x in range(0, 9)]
+                for y in range(0, 10)]
+    return tables
+
+
+def _piece_steps(kind: str, is_red: bool, pos: tuple[int, int]) \
+        -> list[tuple[Optional[tuple[int, int]], tuple[int, int]]]:
+    """Return the steps (leg, target) of the piece of the given kind and colour at pos, where
+    the targets may be out of bounds, as used by _calculate_piece_steps.
+
+    Preconditions:
+        - kind in {'h', 'e', 'a', 'k', 'p'}
+    """
+    y, x = pos
+    steps = []  # accumulator
+
+    if kind == 'h':
+        # The legs are the 'horse-leg' conditions
+        if y != 0:
+            steps += [((y - 1, x), (y - 2, x + 1)), ((y - 1, x), (y - 2, x - 1))]
+        if y != 9:
+            steps += [((y + 1, x), (y + 2, x + 1)), ((y + 1, x), (y + 2, x - 1))]
+        if x != 0:
+            steps += [((y, x - 1), (y + 1, x - 2)), ((y, x - 1), (y - 1, x - 2))]
+        if x != 8:
+            steps += [((y, x + 1), (y + 1, x + 2)), ((y, x + 1), (y - 1, x + 2))]
+    elif kind == 'e':
+        if y not in {0, 5}:  # Can move towards black base
+            # The legs are the 'elephant-leg' conditions
+            if x != 0:
+                steps.append(((y - 1, x - 1), (y - 2, x - 2)))
+            if x != 8:
+                steps.append(((y - 1, x + 1), (y - 2, x + 2)))
+        if y not in {4, 9}:  # Can move towards red base
+            if x != 0:
+                steps.append(((y + 1, x - 1), (y + 2, x - 2)))
+            if x != 8:
+                steps.append(((y + 1, x + 1), (y + 2, x + 2)))
+    elif kind == 'a':  # Movement restricted in palace
+        if y not in {2, 9}:
+            if x != 3:
+                steps.append((None, (y + 1, x - 1)))
+            if x != 5:
+                steps.append((None, (y + 1, x + 1)))
+        if y not in {0, 7}:
+            if x != 3:
+                steps.append((None, (y - 1, x - 1)))
+            if x != 5:
+                steps.append((None, (y - 1, x + 1)))
+    elif kind == 'k':  # Movement restricted in palace, see also _find_confront_target
+        if y not in {2, 9}:
+            steps.append((None, (y + 1, x)))
+        if y not in {0, 7}:
+            steps.append((None, (y - 1, x)))
+        if x != 3:
+            steps.append((None, (y, x - 1)))
+        if x != 5:
+            steps.append((None, (y, x + 1)))
+    elif is_red:  # kind == 'p'
+        steps.append((None, (y - 1, x)))
+        if y <= 4:  # Crossed the river, so can move horizontally
+            steps += [(None, (y, x + 1)), (None, (y, x - 1))]
+    else:  # kind == 'p' and not is_red
+        steps.append((None, (y + 1, x)))
+        if y >= 5:  # Crossed the river, so can move horizontally
+            steps += [(None, (y, x + 1)), (None, (y, x - 1))]
+
+    return steps
+
+
+def _calculate_piece_rays() -> dict[bool, list[list[list[list[tuple[int, int, str]]]]]]:
+    """Return a mapping from is_red to a table of the rays of a piece of that colour (moving
+    like a chariot) from each position of the board.
+
+    The rays of a position go down, up, right, and left, in that order, and each ray lists the
+    positions (y, x) along it from the nearest one, with the wxf notation of the movement
+    there without the piece (e.g. '+1').
+
+    >>> rays = _calculate_piece_rays()
+    >>> rays[True][9][0][1][:2]
+    [(8, 0, '+1'), (7, 0, '+2')]
+    >>> rays[False][0][0][2][:2]
+    [(0, 1, '.2'), (0, 2, '.3')]
+    """
+    tables = {}
+    for is_red in (True, False):
+        tables[is_red] = [
+            [[[(y + dy * i, x + dx * i,
+                _get_wxf_movement([], (y, x), (y + dy * i, x + dx * i), is_red, ''))
+               for i in range(1, 10)
+               if 0 <= y + dy * i <= 9 and 0 <= x + dx * i <= 8]  # Only within bounds
+              for dy, dx in [(1, 0), (-1, 0), (0, 1), (0, -1)]]
+             for x in range(0, 9)]
+            for y in range(0, 10)]
+    return tables
+
+
 def _absolute_pawn(board: list[list[Optional[_Piece]]], pos: tuple[int, int]) -> int:
     """Calculate the points for all pawns on the board. If the pawn does not cross river,
     it is 100 points. Otherwise, it is 200 points
@@ -1166,6 +1396,8 @@ class _Piece:
     kind: str
     is_red: bool
 
+    __slots__ = ('kind', 'is_red')  # Boards are copied often, keep pieces small
+
     def __init__(self, kind: str, is_red: bool) -> None:
         """Initialize a new piece."""
         self.kind = kind
@@ -1177,6 +1409,15 @@ class _Piece:
         return self.kind == other.kind and self.is_red == other.is_red  # Same kind, same colour
 
 
+# The absolute points of every piece on every position, see _calculate_piece_square_points
+_PIECE_SQUARE_POINTS = _calculate_piece_square_points()
+
+# The moves of every piece from every position on an empty board, see _calculate_piece_steps
+# and _calculate_piece_rays
+_PIECE_STEPS = _calculate_piece_steps()
+_PIECE_RAYS = _calculate_piece_rays()
+
+
 if __name__ == '__main__':
     # import python_ta.contracts
     # python_ta.contracts.check_all_contracts()
@@ -1187,7 +1428,7 @@ if __name__ == '__main__':
     #     # Note: we ran PyTA against the starter file a2_minichess.py given in Assignment 2,
     #     # and disabled the ones that file did not pass either.
     #     'disable': ['E1136', 'E9989', 'E9998', 'W1401', 'R0201', 'R1702', 'R0912', 'R0913'],
-    #     'extra-imports': ['typing', 'statistics', 'copy']
+    #     'extra-imports': ['typing', 'statistics', 'copy', 'random']
     # })
 
     import doctest
@@ -7,7 +7,8 @@ This Python module contains the GameTree class, which stores
 various attributes for Chinese Chess moves. Also, this module
 contains functions that convert between the aforementioned
 GameTree class and xml files, where xml files are used to store
-preexisting GameTrees.
+preexisting GameTrees, as well as a compact binary format that
+can be loaded much faster than xml.
 
 The following methods/classes are adapted (with changes) from the
 a2_game_tree.py module from the Assignment 2 starter files:
@@ -27,10 +28,13 @@ This file is Copyright (c) 2021 Junru Lin, Zixiu Meng, Krystal Miao, Jenci Wei
 
 
 from __future__ import annotations
-from typing import Optional
-import csv
+from typing import Iterable, Iterator, Optional
+import itertools
 import xml.etree.cElementTree as ET
 import math
+import mmap
+import multiprocessing
+import struct
 
 import chess_game
 from chess_game import ChessGame
@@ -38,6 +42,19 @@ from chess_game import ChessGame
 GAME_START_MOVE = '*'
 ESTIMATION = 0.8
 
+# Every distinct move is stored once in MOVE_VOCAB, and GameTrees refer to their move by its
+# index in MOVE_VOCAB (its move_id). MOVE_INDEX maps each move back to its move_id.
+MOVE_VOCAB = [GAME_START_MOVE]
+MOVE_INDEX = {GAME_START_MOVE: 0}
+
+# Layout of the binary tree files (see tree_to_binary)
+_BINARY_MAGIC = b'GTB1'
+_BINARY_COUNT = struct.Struct('<I')
+_BINARY_NODE = struct.Struct('<IH?iff')  # parent, move, is_red_move, points, red/black prob
+_NO_PARENT = 0xFFFFFFFF
+
+_READ_BUFFER_SIZE = 1 << 20  # Read the csv files of games 1 MiB at a time
+
 
 class GameTree:
     """A decision tree for chess moves.
@@ -46,8 +63,9 @@ class GameTree:
     the current player (who will make the next move) is Red or Black.
 
     Instance Attributes:
-        - move: the current chess move (expressed in wxf notation), or '*' if this tree
-                represents the start of a game
+        - move_id: the index in MOVE_VOCAB of the current chess move (expressed in wxf
+                   notation), or of '*' if this tree represents the start of a game.
+                   The move itself is available as the move property.
         - is_red_move: True if Red is to make the next move after this, False otherwise
         - relative_points: related to absolute points as defined in calculate_absolute_points in
                            chess_game.py. For more information, see GameTree.reevaluate.
@@ -68,7 +86,7 @@ class GameTree:
         - 0 <= red_win_probability <= 1
         - 0 <= black_win_probability <= 1
     """
-    move: str
+    move_id: int
     is_red_move: bool
     relative_points: int
     red_win_probability: float
@@ -80,6 +98,10 @@ class GameTree:
     #      move by the current player
     _subtrees: list[GameTree]
 
+    # Trees can have millions of nodes, so do not give every node an attribute dictionary
+    __slots__ = ('move_id', 'is_red_move', 'relative_points', 'red_win_probability',
+                 'black_win_probability', '_subtrees')
+
     def __init__(self, move: str = GAME_START_MOVE,
                  is_red_move: bool = True, relative_points: int = 0,
                  red_win_probability: float = 0.0, black_win_probability: float = 0.0) -> None:
@@ -91,13 +113,25 @@ class GameTree:
         >>> game.is_red_move
         True
         """
-        self.move = move
+        self.move_id = get_move_id(move)
         self.is_red_move = is_red_move
         self.red_win_probability = red_win_probability
         self.black_win_probability = black_win_probability
         self.relative_points = relative_points
         self._subtrees = []
 
+    @property
+    def move(self) -> str:
+        """The current chess move (expressed in wxf notation), or '*' if this tree
+        represents the start of a game.
+        """
+        return MOVE_VOCAB[self.move_id]
+
+    @move.setter
+    def move(self, move: str) -> None:
+        """Set the current chess move to move."""
+        self.move_id = get_move_id(move)
+
     def get_subtrees(self) -> list[GameTree]:
         """Return the subtrees of this game tree."""
         return self._subtrees
@@ -107,8 +141,12 @@ class GameTree:
 
         Return None if no subtree corresponds to that move.
         """
+        move_id = MOVE_INDEX.get(move)
+        if move_id is None:  # No tree has ever stored this move
+            return None
+
         for subtree in self._subtrees:
-            if subtree.move == move:
+            if subtree.move_id == move_id:  # Compare integers instead of strings
                 return subtree
 
         return None
@@ -210,16 +248,19 @@ class GameTree:
                 s += subtree._str_indented(depth + 1)
             return s
 
-    def insert_move_sequence(self, moves: list[str], points: list[int],
+    def insert_move_sequence(self, moves: Iterable[str], points: Iterable[int],
                              red_win_probability: float = 0.0,
                              black_win_probability: float = 0.0) -> None:
         """Insert the given sequence of moves into this tree.
 
         Parameters:
-            - moves: a list of moves in a game, with several red-black turns
-            - points: a lisyt of the relative points of the game, corresponding to the games
+            - moves: the moves in a game, with several red-black turns
+            - points: the relative points of the game, corresponding to the games
                       after each move in moves
 
+        moves and points may be any iterables (e.g. generators), so the caller does not
+        need to build a list for each game.
+
         The inserted moves form a chain of descendants, where:
             - moves[0] is a child of this tree's root
             - moves[1] is a child of moves[0]
@@ -227,7 +268,7 @@ class GameTree:
             - etc.
 
         Precondictions:
-            - len(moves) == len(points)
+            - moves and points have the same length
             - moves represents a all moves in a complete game
 
         >>> tree = GameTree()
@@ -251,51 +292,24 @@ class GameTree:
                   z -> Black's move
         <BLANKLINE>
         """
-        self.insert_move_index(0, moves, points, red_win_probability, black_win_probability)
-
-    def insert_move_index(self, curr_index: int, moves: list[str], points: list[int],
-                          red_win_probability: float, black_win_probability: float,) -> None:
-        """A help method for insert_move_sequence.
-
-        Preconditions:
-            - curr_index <= len(moves)
-        """
-        if curr_index == len(moves):  # base case
-            return
-        else:
-            curr_move = moves[curr_index]
-            relative_point = points[curr_index]
-            for subtree in self._subtrees:
-                if subtree.move == curr_move:
-                    # curr_move exists in subtrees, check the next move in moves
-                    subtree.insert_move_index(curr_index + 1, moves, points,
-                                              red_win_probability, black_win_probability)
-                    # trees may be updated after we call insert_move_index method
-                    # so we need to update win probability
-                    self._update_win_probabilities()
-                    # an early return
-                    return
-
-            # there is no early return after the for loop and we need to create a new subtree
-            if self.is_red_move:
-                # should be Black next
-                self.add_subtree(GameTree(move=curr_move,
-                                          is_red_move=False,
-                                          relative_points=relative_point,
-                                          red_win_probability=red_win_probability,
-                                          black_win_probability=black_win_probability))
-            else:
-                # should be Red next
-                self.add_subtree(GameTree(move=curr_move,
-                                          is_red_move=True,
-                                          relative_points=relative_point,
-                                          red_win_probability=red_win_probability,
-                                          black_win_probability=black_win_probability))
-            # recurse on the next move in moves
-            self._subtrees[-1].insert_move_index(curr_index + 1, moves, points,
-                                                 red_win_probability, black_win_probability)
-            # trees may be updated after we call insert_move_index method
-            self._update_win_probabilities()
+        path = [self]  # the chain of trees visited, from the root downwards
+        curr_tree = self
+        for curr_move, relative_point in zip(moves, points):
+            subtree = curr_tree.find_subtree_by_move(curr_move)
+            if subtree is None:  # the move does not exist yet, so create a new subtree
+                subtree = GameTree(move=curr_move,
+                                   is_red_move=not curr_tree.is_red_move,
+                                   relative_points=relative_point,
+                                   red_win_probability=red_win_probability,
+                                   black_win_probability=black_win_probability)
+                curr_tree._subtrees.append(subtree)
+            path.append(subtree)
+            curr_tree = subtree
+
+        # Only the trees along the path may have changed, so update their win probabilities
+        # from the bottom up
+        for tree in reversed(path):
+            tree._update_win_probabilities()
 
     def _update_win_probabilities(self) -> None:
         """Update the red and black win probabilities of this tree.
@@ -344,14 +358,15 @@ class GameTree:
 
     def purge(self) -> None:
         """Remove duplicate subtrees (if there is any)."""
-        moves_so_far = []  # accumulator
+        subtrees_by_move = {}  # accumulator, maps each move_id to its first subtree
         for subtree in self._subtrees:
-            if subtree.move in moves_so_far:  # this is a duplicate, so:
-                self._subtrees.remove(subtree)  # remove the subtree
-                # and merge with the subtree with the same move
-                self.find_subtree_by_move(subtree.move).merge_with(subtree)
-            else:  # No duplicates yet, store the move in the accumulator
-                moves_so_far.append(subtree.move)
+            if subtree.move_id in subtrees_by_move:  # this is a duplicate, so merge it
+                subtrees_by_move[subtree.move_id].merge_with(subtree)  # with the first one
+            else:  # No duplicates yet, store the subtree in the accumulator
+                subtrees_by_move[subtree.move_id] = subtree
+
+        if len(subtrees_by_move) != len(self._subtrees):  # remove the merged duplicates
+            self._subtrees = list(subtrees_by_move.values())
 
     def reevaluate(self) -> None:
         """Re-evaluate the relative points and win-probabilities of this tree.
@@ -421,22 +436,78 @@ class GameTree:
                 z -> Red's move
         <BLANKLINE>
         """
-        assert self.move == other_tree.move  # They must have the same root moves
-        subtrees_moves = [sub.move for sub in self._subtrees]
+        assert self.move_id == other_tree.move_id  # They must have the same root moves
+        subtrees_by_move = {sub.move_id: sub for sub in reversed(self._subtrees)}
         for subtree in other_tree.get_subtrees():
-            if subtree.move in subtrees_moves:  # we already have the move, so
+            if subtree.move_id in subtrees_by_move:  # we already have the move, so
                 # recurse down into their subtrees
-                index = subtrees_moves.index(subtree.move)
-                self._subtrees[index].merge_with(subtree)
+                subtrees_by_move[subtree.move_id].merge_with(subtree)
             else:  # we don't have the move yet, so add it
                 self.add_subtree(subtree)
+                subtrees_by_move[subtree.move_id] = subtree
 
         # Now the two trees are merged. Re-evaluate the large tree so that its
         # attributes are consistent (with all the leaf values)
         self.reevaluate()
 
+    def __reduce__(self) -> tuple:
+        """Return how to pickle this tree.
+
+        The whole tree is flattened into a list of node records in pre-order, so that
+        pickling does not recurse once per level of the tree (games can be hundreds of moves
+        long). Moves are stored as strings rather than move_ids, since each process has its
+        own MOVE_VOCAB.
 
-def load_game_tree(games_file: str) -> GameTree:
+        >>> import pickle
+        >>> tree = GameTree()
+        >>> tree.insert_move_sequence(['a', 'b', 'c'], [1, 2, 3], red_win_probability=1.0)
+        >>> copied = pickle.loads(pickle.dumps(tree))
+        >>> str(copied) == str(tree) and copied.red_win_probability == 1.0
+        True
+        """
+        records = []  # accumulator
+        stack = [(self, -1)]
+        while stack:
+            curr_tree, parent = stack.pop()
+            records.append((parent, curr_tree.move, curr_tree.is_red_move,
+                            curr_tree.relative_points, curr_tree.red_win_probability,
+                            curr_tree.black_win_probability))
+            index = len(records) - 1
+            stack.extend((subtree, index) for subtree in reversed(curr_tree._subtrees))
+
+        return _tree_from_records, (records,)
+
+
+def _tree_from_records(records: list[tuple]) -> GameTree:
+    """Return the tree stored in records, as generated by GameTree.__reduce__."""
+    nodes = []  # accumulator
+    for parent, move, is_red_move, points, red_prob, black_prob in records:
+        node = GameTree(move, is_red_move, points, red_prob, black_prob)
+        if parent != -1:
+            # The stored probabilities are already up to date, so don't use add_subtree
+            nodes[parent].get_subtrees().append(node)
+        nodes.append(node)
+
+    return nodes[0]
+
+
+def get_move_id(move: str) -> int:
+    """Return the move_id of the given move, adding move to MOVE_VOCAB if it is new.
+
+    >>> MOVE_VOCAB[get_move_id('c2.5')]
+    'c2.5'
+    >>> get_move_id('c2.5') == get_move_id('c2.5')
+    True
+    """
+    move_id = MOVE_INDEX.get(move)
+    if move_id is None:  # A new move, give it the next available move_id
+        move_id = len(MOVE_VOCAB)
+        MOVE_INDEX[move] = move_id
+        MOVE_VOCAB.append(move)
+    return move_id
+
+
+def load_game_tree(games_file: str, processes: int = 1) -> GameTree:
     """Create a game tree based on games_file.
 
     A small smaple of games_file:
@@ -450,8 +521,12 @@ def load_game_tree(games_file: str) -> GameTree:
 
     Assume there is no draw and the last person to make a move in moves is the winner.
 
+    If processes > 1, the games are divided by their first move, and the subtree of each
+    first move is built in a separate process, since those subtrees never overlap.
+
     Preconditions:
         - games_file refers to a csv file in the same format as the small sample.
+        - processes >= 1
 
     >>> tree = load_game_tree('data/small_sample.csv')
     >>> print(tree)
@@ -465,52 +540,106 @@ def load_game_tree(games_file: str) -> GameTree:
               A6+5 -> Black's move
                 p7+1 -> Red's move
     <BLANKLINE>
+    >>> str(load_game_tree('data/small_sample.csv', processes=2)) == str(tree)
+    True
+    """
+    if processes == 1:
+        return _build_tree(_read_games(games_file))
+
+    shards = {}  # maps each first move to the games starting with it
+    for sequence in _read_games(games_file):
+        shards.setdefault(sequence[0], []).append(sequence)
+
+    tree = GameTree()
+    with multiprocessing.Pool(processes) as pool:
+        # chunksize=1 so that a large shard does not hold up the small ones queued after it
+        for shard_tree in pool.imap(_build_tree, shards.values(), chunksize=1):
+            for subtree in shard_tree.get_subtrees():  # the subtree of the shard's first move
+                tree.add_subtree(subtree)
+
+    return tree
+
+
+def _build_tree(games: Iterable[list[str]]) -> GameTree:
+    """Return a game tree containing the given games, where each game is a sequence of moves.
+
+    Assume there is no draw and the last person to make a move in a game is the winner.
     """
     tree = GameTree()
-    games = {}  # the key is gameID and the value is a list
-
-    with open(games_file) as csv_file:
-        reader = csv.reader(csv_file)
-        next(reader)  # skip the header row
-        for row in reader:
-            # row[0] is gameID, which is unique
-            if row[0] not in games:  # create a new list
-                # row[2] is side and row[3] is move
-                # games[row[0]] is a list and its i-th element is the i-th turn of the game,
-                # which is a list with the first element being red's move, and possibly
-                # the second element being black's move
-                games[row[0]] = [[row[3]]]
-            else:  # row[0] is in games
-                turn = int(row[1])
-                if turn > len(games[row[0]]):  # Need to add a new turn in the list
-                    games[row[0]].append([row[3]])
-                else:  # Need to add black's move to the existing list
-                    games[row[0]][turn - 1].append(row[3])
-
-    for game_id in games:
-        # game is a list consisting of many lists, with each list representing a turn
-        game = games[game_id]
+
+    for sequence in games:
         new_game = ChessGame()  # simulate a new game to calculate relative points
-        sequence_so_far = []  # collect the red-black turn of game
-        points_so_far = []  # the relative point corresponding to sequence_so_far
-
-        for turn in game:  # turn is a list of two moves (red-black) or one move (red)
-            sequence_so_far += turn
-        for move in sequence_so_far:
-            # simulate a move in game to get the point after this move
-            new_game.make_move(move)
-            board = new_game.get_board()
-            points_so_far.append(chess_game.calculate_absolute_points(board))
-
-        if len(sequence_so_far) % 2 == 1:
+
+        if len(sequence) % 2 == 1:
             # Red is the winner since Black did not move after Red made a move
-            tree.insert_move_sequence(sequence_so_far, points_so_far, red_win_probability=1)
+            tree.insert_move_sequence(sequence, _points_after_moves(new_game, sequence),
+                                      red_win_probability=1)
         else:  # Black is the winner
-            tree.insert_move_sequence(sequence_so_far, points_so_far, black_win_probability=1)
+            tree.insert_move_sequence(sequence, _points_after_moves(new_game, sequence),
+                                      black_win_probability=1)
 
     return tree
 
 
+def _read_games(games_file: str) -> Iterator[list[str]]:
+    """Yield the sequence of moves of each game in games_file, in a single pass over the file.
+
+    Only the game currently being read is held in memory: the moves of each game are
+    interleaved (red, black, red, ...) and yielded as soon as the game is read.
+
+    Preconditions:
+        - games_file refers to a csv file in the same format as in load_game_tree
+        - the rows of each game are contiguous in games_file, with the rows of each side
+          in increasing order of turn
+
+    >>> [len(sequence) for sequence in _read_games('data/small_sample.csv')]
+    [6, 6]
+    """
+    # The file has no quoted fields, so splitting each line by hand is enough (and much
+    # faster than the csv module); a large buffer reduces the number of reads
+    with open(games_file, buffering=_READ_BUFFER_SIZE) as file:
+        next(file)  # skip the header row
+        # Group the lines by gameID, i.e. everything before the first comma
+        for _, lines in itertools.groupby(file, key=lambda line: line.split(',', 1)[0]):
+            red_moves, black_moves = [], []
+            for line in lines:
+                _, _, side, move = line.rstrip().split(',')
+                if side.strip() == 'red':  # the side may be padded with spaces
+                    red_moves.append(move)
+                else:  # side == 'black'
+                    black_moves.append(move)
+            yield _interleave(red_moves, black_moves)
+
+
+def _interleave(red_moves: list[str], black_moves: list[str]) -> list[str]:
+    """Return the moves of a game in the order they are made, given the moves of each side.
+
+    Preconditions:
+        - len(red_moves) - len(black_moves) in {0, 1}
+
+    >>> _interleave(['C2.5', 'H2+3'], ['h2+3'])
+    ['C2.5', 'h2+3', 'H2+3']
+    """
+    sequence = [''] * (len(red_moves) + len(black_moves))
+    sequence[0::2] = red_moves  # Red moves first
+    sequence[1::2] = black_moves
+    return sequence
+
+
+def _points_after_moves(game: ChessGame, moves: Iterable[str]) -> Iterator[int]:
+    """Make each of the given moves in game, yielding the absolute points of the board
+    after each move.
+
+    This function mutates its input game.
+
+    Preconditions:
+        - moves is a sequence of valid moves starting from the current state of game
+    """
+    for move in moves:
+        game.make_move(move)
+        yield chess_game.calculate_absolute_points(game.get_board())
+
+
 def tree_to_xml(tree: GameTree, filename: str) -> None:
     """Store the given GameTree as an xml file with the given filename.
 
@@ -555,35 +684,148 @@ def _build_e_tree(root_move: ET.Element, tree: GameTree) -> None:
 def xml_to_tree(filename: str) -> GameTree:
     """Return a game tree which is stored in the specified xml file.
 
+    The file is parsed incrementally: every move element is turned into a GameTree as soon as
+    its start tag is read, and is discarded once its end tag is read, so the whole ElementTree
+    is never held in memory.
+
     Precondition:
         - filename must be a file generated by the tree_to_xml function
     """
-    tree = GameTree()
-    with open(filename) as file:
-        e_tree = ET.parse(file)  # Convert the xml file into an ElementTree
-        root_move = e_tree.getroot()[0]  # There is only 1 root move (*), which is in index 0
-        _build_game_tree(root_move, tree)
+    tree = None
+    path = []  # The GameTrees from the root to the move element being parsed
+    for event, move in ET.iterparse(filename, events=('start', 'end')):
+        if move.tag != 'm':
+            continue  # The enclosing <GameTree> element
+
+        if event == 'start':
+            subtree = GameTree(move.attrib['m'], move.attrib['i'] == 't', int(move.attrib['p']),
+                               float(move.attrib['r']), float(move.attrib['b']))
+            if path == []:
+                tree = subtree  # There is only 1 root move (*)
+            else:
+                path[-1].get_subtrees().append(subtree)
+            path.append(subtree)
+        else:  # event == 'end', so all subtrees of this move have been read
+            path.pop()._update_win_probabilities()
+            move.clear()
 
     return tree
 
 
-def _build_game_tree(move: ET.Element, tree: GameTree) -> None:
-    """Helper function that recursively builds up a GameTree from an ElementTree.
+def load_tree(filename: str) -> GameTree:
+    """Return the game tree stored in the given file, which is read by binary_to_tree if the
+    filename ends with '.bin', and by xml_to_tree otherwise.
+
+    Precondition:
+        - filename must be a file generated by save_tree
+    """
+    if filename.endswith('.bin'):
+        return binary_to_tree(filename)
+    else:
+        return xml_to_tree(filename)
+
+
+def save_tree(tree: GameTree, filename: str) -> None:
+    """Store the given GameTree in the given file, which is written by tree_to_binary if the
+    filename ends with '.bin', and by tree_to_xml otherwise.
 
-    This function mutates its input tree.
+    The binary format is several times faster to load (see binary_to_tree).
     """
-    tree.move = move.attrib['m']  # Extract GameTree.move attribute
-    tree.is_red_move = move.attrib['i'] == 't'  # Extract GameTree.is_red_move attribute
-    tree.relative_points = int(move.attrib['p'])  # Extract GameTree.relative_points attribute
+    if filename.endswith('.bin'):
+        tree_to_binary(tree, filename)
+    else:
+        tree_to_xml(tree, filename)
 
-    # Extract GameTree.red_win_probability and GameTree.black_win_probability attribute
-    tree.red_win_probability = float(move.attrib['r'])
-    tree.black_win_probability = float(move.attrib['b'])
 
-    for child_move in move:
-        subtree = GameTree()
-        _build_game_tree(child_move, subtree)  # Recurse into subtrees
-        tree.add_subtree(subtree)
+def tree_to_binary(tree: GameTree, filename: str) -> None:
+    """Store the given GameTree as a binary file with the given filename.
+
+    The file starts with the moves used in the tree (each one as a length-prefixed utf-8
+    string), followed by one fixed-size record per node in pre-order. Each record stores:
+        - the index of the record of the parent node (_NO_PARENT for the root)
+        - the index of the move in the list of moves at the start of the file
+        - is_red_move
+        - relative_points
+        - red_win_probability and black_win_probability, as 32-bit floats
+
+    Since parents are always stored before their children, binary_to_tree can rebuild the
+    tree in a single sequential pass without parsing any text.
+
+    >>> tree = load_game_tree('data/small_sample.csv')
+    >>> tree_to_binary(tree, 'temp/small_sample.bin')
+    >>> str(binary_to_tree('temp/small_sample.bin')) == str(tree)
+    True
+    >>> import os
+    >>> os.remove('temp/small_sample.bin')
+    """
+    moves = {}  # maps the move_id of each move in tree to its index in the file
+    records = []  # accumulator
+    stack = [(tree, _NO_PARENT)]
+    while stack:  # Walk the tree in pre-order
+        curr_tree, parent = stack.pop()
+        file_move_id = moves.setdefault(curr_tree.move_id, len(moves))
+        records.append(_BINARY_NODE.pack(parent, file_move_id, curr_tree.is_red_move,
+                                         curr_tree.relative_points,
+                                         curr_tree.red_win_probability,
+                                         curr_tree.black_win_probability))
+        # Push the subtrees in reverse so that they are popped (and stored) in order
+        index = len(records) - 1
+        stack.extend((subtree, index) for subtree in reversed(curr_tree.get_subtrees()))
+
+    with open(filename, 'wb') as file:
+        file.write(_BINARY_MAGIC)
+        file.write(_BINARY_COUNT.pack(len(moves)))
+        for move_id in moves:  # dicts keep insertion order, which is the order of the indices
+            encoded = MOVE_VOCAB[move_id].encode('utf-8')
+            file.write(bytes([len(encoded)]) + encoded)
+        file.write(_BINARY_COUNT.pack(len(records)))
+        file.write(b''.join(records))
+
+
+def binary_to_tree(filename: str) -> GameTree:
+    """Return a game tree which is stored in the specified binary file.
+
+    The file is memory-mapped and decoded with struct, so no text parsing is involved.
+    Note that the win probabilities are stored as 32-bit floats, so they may differ from
+    those of the stored tree after the 7th significant digit.
+
+    Precondition:
+        - filename must be a file generated by the tree_to_binary function
+    """
+    with open(filename, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        if buffer[:len(_BINARY_MAGIC)] != _BINARY_MAGIC:
+            raise ValueError(f'{filename} is not a binary game tree file')
+        offset = len(_BINARY_MAGIC)
+
+        # Read the moves, converting them to the move_ids of this process
+        num_moves = _BINARY_COUNT.unpack_from(buffer, offset)[0]
+        offset += _BINARY_COUNT.size
+        move_ids = []
+        for _ in range(num_moves):
+            length = buffer[offset]
+            move_ids.append(get_move_id(buffer[offset + 1:offset + 1 + length].decode('utf-8')))
+            offset += 1 + length
+
+        # Read the nodes, each of which comes after its parent
+        num_nodes = _BINARY_COUNT.unpack_from(buffer, offset)[0]
+        offset += _BINARY_COUNT.size
+        end = offset + num_nodes * _BINARY_NODE.size
+        nodes = []  # accumulator
+        # Decode the nodes through a memoryview, so that they are not copied out of the mapped
+        # file first; the view is released before the file is unmapped
+        with memoryview(buffer) as view, view[offset:end] as node_view:
+            for parent, file_move_id, is_red_move, points, red_prob, black_prob \
+                    in _BINARY_NODE.iter_unpack(node_view):
+                node = GameTree(is_red_move=is_red_move, relative_points=points,
+                                red_win_probability=red_prob, black_win_probability=black_prob)
+                node.move_id = move_ids[file_move_id]
+                if parent != _NO_PARENT:
+                    # The stored probabilities are already up to date, so don't use add_subtree
+                    nodes[parent].get_subtrees().append(node)
+                nodes.append(node)
+
+    return nodes[0]
 
 
 if __name__ == '__main__':
@@ -597,5 +839,6 @@ if __name__ == '__main__':
     # python_ta.check_all(config={
     #     'max-line-length': 100,
     #     'disable': ['E1136', 'E9998', 'R0913'],
-    #     'extra-imports': ['csv', 'xml.etree.cElementTree', 'math', 'chess_game']
+    #     'extra-imports': ['itertools', 'xml.etree.cElementTree', 'math', 'mmap',
+    #                       'multiprocessing', 'struct', 'chess_game']
     # })
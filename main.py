@@ -14,6 +14,9 @@ This file is Copyright (c) 2021 Junru Lin, Zixiu Meng, Krystal Miao, Jenci Wei
 from player import AIBlack, ExploringPlayer
 from visualization import Game
 
+_VALID_OPTIONS = frozenset('1234')  # The AIs the user can choose to fight against
+_YES = frozenset({'y', 'Y'})  # The answers that enable a setting
+
 
 def present() -> None:
     """Present our project. Gives the user the options of fighting against AIs of different
@@ -30,31 +33,13 @@ def present() -> None:
     print("'4' for an advanced-level AI (Warning: each step takes 30-600 seconds)")  # EP Depth 4
     option = input()
 
-    while option not in {'1', '2', '3', '4'}:
+    while option not in _VALID_OPTIONS:
         print('Invalid input. Please try again.')
         option = input()
 
     print("Please indicate your music settings:")
-
-    print("Enter 'y' (just the letter) if you want background music. "
-          "Enter anything else otherwise.")
-    bgm_option = input()
-    if bgm_option == 'y':
-        bgm = True
-        print('Background music enabled.')
-    else:
-        bgm = False
-        print('Background music disabled.')
-
-    print("Enter 'y' (just the letter) if you want sound effects. "
-          "Enter anything else otherwise.")
-    sfx_option = input()
-    if sfx_option == 'y':
-        sfx = True
-        print('Sound effects enabled.')
-    else:
-        sfx = False
-        print('Sound effects disabled.')
+    bgm = _prompt_setting('background music', 'Background music')
+    sfx = _prompt_setting('sound effects', 'Sound effects')
 
     if option == '3':
         g = Game(AIBlack('tree.xml', 3), bgm, sfx)
@@ -66,6 +51,20 @@ def present() -> None:
     g.run()
 
 
+def _prompt_setting(description: str, name: str) -> bool:
+    """Ask the user whether they want the setting described by description, and return
+    whether it is enabled. name is used when reporting the choice back to the user.
+    """
+    print(f"Enter 'y' (just the letter) if you want {description}. "
+          "Enter anything else otherwise.")
+    if input() in _YES:
+        print(f'{name} enabled.')
+        return True
+    else:
+        print(f'{name} disabled.')
+        return False
+
+
 if __name__ == '__main__':
     # import python_ta
     # python_ta.check_all(config={
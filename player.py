@@ -15,13 +15,75 @@ This file is Copyright (c) 2021 Junru Lin, Zixiu Meng, Krystal Miao, Jenci Wei
 from __future__ import annotations
 import multiprocessing
 import random
-import os
+import struct
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from operator import attrgetter
 from typing import Optional
-from chess_game import ChessGame, calculate_absolute_points
-from game_tree import GameTree, xml_to_tree, tree_to_xml
+from chess_game import ChessGame
+from game_tree import GameTree, load_tree, save_tree
 
 PROCESSES = 9
 EPSILON = 0.2
+QUIESCENCE_DEPTH = 4
+OPENING_DEPTH = 3
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+ASPIRATION_MIN_DEPTH = 3
+ASPIRATION_WINDOW = 50
+
+# Used as +- infinity by the searches. It is greater than any points a search can return, which
+# are at most the points of a board plus 5000 for every remaining depth (see _alpha_beta), and
+# still fits the 32-bit values of the transposition table.
+INFINITY = 1000000
+
+# Maps the winner of a finished game to (side, red_win_probability, black_win_probability),
+# where side is 1 if red wins, -1 if black wins, and 0 for a draw
+_TERMINAL_RESULTS = {'Red': (1, 1.0, 0.0), 'Black': (-1, 0.0, 1.0), 'Draw': (0, 0.0, 0.0)}
+
+# The transposition table used by ExploringPlayer._alpha_beta, mapping the Zobrist hash of a
+# position to (depth, flag, value, best_move, red_win_probability, black_win_probability),
+# where depth is the remaining search depth the value was computed with, and flag states
+# whether value is exact (EXACT), or only a lower (LOWER_BOUND) or upper (UPPER_BOUND) bound
+# on the true value because the search of that position was cut off.
+#
+# The table lives in memory shared by the main process and the worker processes of the
+# process pool, so that a position searched by one process is known to all of them. It has
+# TRANSPOSITION_TABLE_SIZE slots of _TT_SLOT_SIZE bytes, and a position is stored in the slot
+# given by the lowest bits of its hash, replacing whatever was there. A slot holds a check
+# word followed by the entry packed with _TT_ENTRY, where the check word is the hash XOR-ed
+# with the CRC-32 of the packed entry. An entry is only used if the check word matches the
+# hash of the position looked up, which also rejects a slot that was half-written by one
+# process while another process was writing to it, so no locking is needed.
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+TRANSPOSITION_TABLE_SIZE = 1 << 20  # must be a power of 2
+_TT_SLOT_SIZE = 32
+_TT_CHECK = struct.Struct('<Q')
+_TT_ENTRY = struct.Struct('<i4shBff')  # value, best_move, depth, flag, win probabilities
+_transposition_array = None  # The shared memory, see _get_transposition_table
+_transposition_table: Optional[memoryview] = None
+
+# The time (as given by time.time()) at which the running search has to stop, or 0 if it
+# may take as long as it needs. Like the transposition table, it lives in shared memory, so
+# that make_move can set it for the worker processes too (see ExploringPlayer.time_budget).
+_search_deadline = None
+
+# The (alpha, beta) window of the running root search, see ExploringPlayer._alpha_beta_multi.
+# Every position searched by any process lies below the root, so its window can be narrowed to
+# this one; it is (-INFINITY, INFINITY) unless moves are being searched in parallel. It lives
+# in shared memory as well, so that a bound found by one worker is used by the others at once.
+_root_window = None
+
+# The process pool used by ExploringPlayer._alpha_beta_multi, see _get_executor
+_executor: Optional[ProcessPoolExecutor] = None
+
+# The ExploringPlayer that searches the root moves given to this process, see _search_move
+_worker_explorer: Optional[ExploringPlayer] = None
+
+
+class _SearchTimeout(Exception):
+    """Raised by ExploringPlayer._alpha_beta when the deadline of the search has passed."""
 
 
 class Player:
@@ -30,10 +92,11 @@ class Player:
     This class can be subclassed to implement different strategies for playing chess.
 
     Instance Attributes:
-        - xml_file: the xml file that stores the game tree
+        - xml_file: the xml file that stores the game tree, or a binary file if its name ends
+          with '.bin' (see game_tree.save_tree)
 
     Representation Invariants:
-        - xml_file represents a valid xml file that stores a GameTree
+        - xml_file represents a valid xml (or binary) file that stores a GameTree
     """
     # Private Instance Attributes:
     #   - _game_tree: the GameTree that this player uses to make its moves.
@@ -89,20 +152,48 @@ class ExploringPlayer(Player):
 
     Instance Attributes:
         - depth: the number of turns the player will explore
+        - time_budget: if not None, the number of seconds the player may spend on a move,
+          in which case depth is only the most number of turns the player will explore
 
     Representation Invariants:
         - self.depth > 0
+        - self.time_budget is None or self.time_budget > 0
     """
     depth: int
+    time_budget: Optional[float]
 
-    def __init__(self, depth: int, tree: GameTree = GameTree()) -> None:
+    # Private Instance Attributes:
+    #   - _killers: the killer moves of each ply, where _killers[ply] holds the last two quiet
+    #               (non-capturing) moves that caused a cutoff at a node ply moves below the
+    #               root of the search, most recent first. See _order_moves.
+    #   - _history: maps each quiet move to how much it has caused cutoffs so far, where a
+    #               cutoff with more remaining depth counts more. See _order_moves.
+    #   - _search_depth: the depth of the root of the running search, so that a position
+    #                    searched with the remaining depth d is _search_depth - d plies below
+    #                    the root
+    #
+    # The killer moves and the history are kept from search to search (the searches of each
+    # depth in make_move, and those of later moves), since moves that refuted one position
+    # often refute similar ones. The root moves searched by the process pool use the tables
+    # of the ExploringPlayer of their worker process instead, see _search_move.
+    _killers: list[list[Optional[str]]]
+    _history: dict[str, int]
+    _search_depth: int
+
+    def __init__(self, depth: int, tree: GameTree = GameTree(),
+                 time_budget: Optional[float] = None) -> None:
         """Initialize this player.
 
         Preconditions:
             - depth >= 1
+            - time_budget is None or time_budget > 0
         """
         self._game_tree = tree
         self.depth = depth
+        self.time_budget = time_budget
+        self._killers = [[None, None] for _ in range(depth + 1)]
+        self._history = {}
+        self._search_depth = depth
 
     def make_move(self, game: ChessGame, previous_move: Optional[str]) -> str:
         """Make a move given the current game.
@@ -113,45 +204,115 @@ class ExploringPlayer(Player):
         Preconditions:
             - There is at least one valid move for the given game
         """
-        if previous_move is None:
-            pass
-        else:
-            self._game_tree = GameTree(previous_move, game.is_red_move())
-
         # Non-multiprocessing version
-        # best_score = self._alpha_beta(game, self._game_tree, self.depth, -1000000, 1000000)
-
-        # Obtain subtrees with the best point
-        best_score = self._alpha_beta_multi(game, self.depth, -1000000, 1000000)
-        subtrees = self._game_tree.get_subtrees()
-        candidate_subtrees = [s for s in subtrees if s.relative_points == best_score]
-
-        if game.is_red_move():
-            # Obtain subtrees with the best self win probability
-            max_probability = max(s.red_win_probability for s in candidate_subtrees)
-            candidate_subtrees = [s for s in candidate_subtrees
-                                  if s.red_win_probability == max_probability]
-
-            # Obtain subtrees with the lowest opponent win probability
-            min_probability = min(s.black_win_probability for s in candidate_subtrees)
-            candidate_subtrees = [s for s in candidate_subtrees
-                                  if s.black_win_probability == min_probability]
-        else:  # not game.is_red_move()
-            # Obtain subtrees with the best self win probability
-            max_probability = max(s.black_win_probability for s in candidate_subtrees)
-            candidate_subtrees = [s for s in candidate_subtrees
-                                  if s.black_win_probability == max_probability]
-
-            # Obtain subtrees with the lowest opponent win probability
-            min_probability = min(s.red_win_probability for s in candidate_subtrees)
-            candidate_subtrees = [s for s in candidate_subtrees
-                                  if s.red_win_probability == min_probability]
+        # best_score = self._alpha_beta(game, self._game_tree, self.depth, -INFINITY, INFINITY)
+
+        # Iterative deepening: search with depth 1, 2, ..., self.depth, where every search
+        # starts with the best move of the previous one. The shallower searches are cheap, and
+        # they fill the transposition table with the best move of each position, which
+        # _alpha_beta then tries first; this makes the deeper searches prune far more.
+        #
+        # Every search but the first two only looks for points close to the points of the
+        # previous search (see _aspiration_search).
+        #
+        # With a time budget, a deeper search is not started once half of the budget is used,
+        # since it would most likely not finish, and a search that runs out of time is
+        # abandoned in favour of the tree of the deepest search that finished.
+        start_time = time.time()
+        completed_tree = None
+        best_score, best_move = None, None
+        for depth in range(1, self.depth + 1):
+            if completed_tree is not None and self.time_budget is not None:
+                if time.time() - start_time > self.time_budget / 2:
+                    break
+                _set_search_deadline(start_time + self.time_budget)
+
+            try:
+                best_score = self._aspiration_search(game, previous_move, depth, best_score,
+                                                     best_move)
+            except _SearchTimeout:
+                self._game_tree = completed_tree
+                break
+            finally:
+                _set_search_deadline(0)
+            completed_tree = self._game_tree
+            best_move = next(s.move for s in self._game_tree.get_subtrees()
+                             if s.relative_points == best_score)
+
+        # Obtain subtrees with the best point, then the best self win probability, then the
+        # lowest opponent win probability
+        candidate_subtrees = _best_subtrees(self._game_tree.get_subtrees(), game.is_red_move())
 
         # If there are still ties, choose one randomly
         chosen_move = random.choice(candidate_subtrees).move
 
         return chosen_move
 
+    def _aspiration_search(self, game: ChessGame, previous_move: Optional[str], depth: int,
+                           guess: Optional[int], first_move: Optional[str]) -> int:
+        """Search game with the given depth, building a new self._game_tree, and return the
+        points of game.
+
+        If depth >= ASPIRATION_MIN_DEPTH and guess (the points found by the previous, shallower
+        search) is not None, the search first uses the narrow window
+        (guess - ASPIRATION_WINDOW, guess + ASPIRATION_WINDOW) instead of (-INFINITY, INFINITY).
+        The points rarely change much from one depth to the next, and a narrow window prunes
+        many more moves. Only if the points turn out to be outside of the window is the game
+        searched again with the full window; this second search is cheap, since the
+        transposition table is filled by the first one.
+
+        Preconditions:
+            - depth > 0
+            - Game has not finished
+            - first_move is None or first_move in game.get_valid_moves()
+
+        The points are the same as those found by plain minimax (with the same leaves), even
+        when the first search is cut off by the narrow window. Here, Black's best move is
+        worth -60, which is below the window (-10, 90):
+
+        >>> game = ChessGame()
+        >>> for wxf_move in ['p1+1', 'a6+5', 'e3+1', 'c8.3', 'c2.7', 'h8+9', 'c8+3', 'r1+1',
+        ...                  'c8-1']:
+        ...     game.make_move(wxf_move)
+        >>> player = ExploringPlayer(3)
+        >>> def minimax(game_state: ChessGame, depth: int) -> int:
+        ...     winner = game_state.get_winner()
+        ...     if winner is not None:
+        ...         side = _TERMINAL_RESULTS[winner][0]
+        ...         return game_state.get_absolute_points() + depth * 5000 * side
+        ...     if depth == 0:
+        ...         return player._quiesce(game_state, -INFINITY, INFINITY, QUIESCENCE_DEPTH)
+        ...     values = []
+        ...     for move in game_state.get_valid_moves():
+        ...         undo_record = game_state.make_move_inplace(move)
+        ...         values.append(minimax(game_state, depth - 1))
+        ...         game_state.undo_move(undo_record)
+        ...     return max(values) if game_state.is_red_move() else min(values)
+        >>> minimax(game, 3)
+        -60
+        >>> player._aspiration_search(game, 'c8-1', 3, 40, None)
+        -60
+        """
+        if guess is not None and depth >= ASPIRATION_MIN_DEPTH:
+            windows = [(guess - ASPIRATION_WINDOW, guess + ASPIRATION_WINDOW),
+                       (-INFINITY, INFINITY)]
+        else:
+            windows = [(-INFINITY, INFINITY)]
+
+        value = guess
+        for alpha, beta in windows:
+            # Start a new tree for every search, since this player may be reused between moves
+            if previous_move is None:
+                self._game_tree = GameTree()
+            else:
+                self._game_tree = GameTree(previous_move, game.is_red_move())
+
+            value = self._alpha_beta_multi(game, depth, alpha, beta, first_move)
+            if alpha < value < beta:  # The points are exact, no need to search again
+                break
+
+        return value
+
     def _alpha_beta(self, game: ChessGame, tree: GameTree, depth: int,
                     alpha: int, beta: int) -> int:
         """The alpha-beta pruning algorithm that will be used when this player makes a move.
@@ -227,170 +388,314 @@ class ExploringPlayer(Player):
         equivalent subtree or worse, and as such cannot influence the final result. The max and min
         levels represent the turn of the player and the adversary, respectively.
 
-        Note: +- 1000000 will be used to represent +- infinity
+        Note: +- INFINITY will be used to represent +- infinity
 
         Preconditions:
             - depth >= 0
         """
-        if game.get_winner() is not None:
+        winner = game.get_winner()
+        if winner is not None:
             # Set win probabilities
-            if game.get_winner() == 'Red':
-                side = 1
-                tree.red_win_probability = 1.0
-                tree.black_win_probability = 0.0
-            elif game.get_winner() == 'Black':
-                side = -1
-                tree.black_win_probability = 1.0
-                tree.red_win_probability = 0.0
-            else:  # draw
-                side = 0
-                tree.red_win_probability = 0.0
-                tree.black_win_probability = 0.0
-            value = calculate_absolute_points(game.get_board()) + depth * 5000 * side
+            side, tree.red_win_probability, tree.black_win_probability = _TERMINAL_RESULTS[winner]
+            value = game.get_absolute_points() + depth * 5000 * side
             # if the game ends while there are still 'remaining' depths, add incentive
             # for the player to win game quickly/add disincentive for player to prevent the
             # other from winning quickly
             tree.relative_points = value
             return value
-        elif depth == 0:
-            value = calculate_absolute_points(game.get_board())
+
+        # Look up the position in the transposition table; an entry searched at least as deep
+        # either gives the value directly or narrows the window
+        key = game.get_zobrist_hash()
+        entry = _probe_transposition(key)
+        # Narrow the window to that of the root search, which other processes may have
+        # narrowed since this search started
+        root_alpha, root_beta = _root_window[0], _root_window[1]
+        if root_alpha >= beta or root_beta <= alpha:
+            # The window is empty: a root move at least as good as any result within the window
+            # has been found, so this position cannot change the result of the root search.
+            # It is not searched, and nothing is stored; the bound of the window that was
+            # crossed is returned, which makes the position irrelevant to the other positions
+            # in this search as well.
+            value = beta if root_alpha >= beta else alpha
             tree.relative_points = value
             return value
-
-        if game.is_red_move():
-            value = -1000000  # Initial value for maximizer (negative infinity)
-            for move in game.get_valid_moves():
+        alpha, beta = max(alpha, root_alpha), min(beta, root_beta)
+        original_alpha, original_beta = alpha, beta
+        if entry is not None and entry[0] >= depth:
+            _, flag, value, _, red_probability, black_probability = entry
+            if flag == LOWER_BOUND:
+                alpha = max(alpha, value)
+            elif flag == UPPER_BOUND:
+                beta = min(beta, value)
+            if flag == EXACT or alpha >= beta:
+                tree.relative_points = value
+                tree.red_win_probability = red_probability
+                tree.black_win_probability = black_probability
+                return value
+
+        if depth > 0 and 0 < _search_deadline.value < time.time():
+            raise _SearchTimeout  # make_move falls back to the result of a shallower search
+
+        best_move = None
+        null_move_value = self._null_move_search(game, depth, alpha, beta)
+        if null_move_value is not None:
+            # Even passing the turn is good enough for the player to move, so there is no need
+            # to search the actual moves (see _null_move_search)
+            value = null_move_value
+        elif depth == 0:
+            # Keep searching the captures, so that the leaf is not evaluated in the middle of
+            # an exchange of pieces
+            value = self._quiesce(game, alpha, beta, QUIESCENCE_DEPTH)
+        elif game.is_red_move():
+            value = -INFINITY  # Initial value for maximizer
+            # Search the best move found by an earlier (shallower) search of this position first
+            killers = self._killers[self._search_depth - depth]
+            for move in _order_moves(game, entry[3] if entry is not None else None, killers,
+                                     self._history):
                 subtree = GameTree(move, False)
-                game_after_move = game.copy_and_make_move(move)
+                undo_record = game.make_move_inplace(move)  # take it back after the search
                 # Red is the maximizing player, so choose the greatest value
-                value = max(value, self._alpha_beta(game_after_move, subtree, depth - 1,
-                                                    alpha, beta))
+                subtree_value = self._alpha_beta(game, subtree, depth - 1, alpha, beta)
+                game.undo_move(undo_record)
+                if subtree_value > value:
+                    value, best_move = subtree_value, move
                 alpha = max(alpha, value)  # Greatest score so far
                 tree.add_subtree(subtree)
                 if alpha >= beta:  # Opponent not going to allow this move, see docstring
+                    if undo_record[2] is None:  # Try this quiet move early at the same ply
+                        _update_killers(killers, move)
+                        self._history[move] = self._history.get(move, 0) + depth * depth
                     break  # beta cutoff
-
-            tree.relative_points = value  # Store value to tree
-            return value
         else:  # Black's move
-            value = 1000000  # Initial value for minimizer (negative infinity)
-            for move in game.get_valid_moves():
+            value = INFINITY  # Initial value for minimizer
+            killers = self._killers[self._search_depth - depth]
+            for move in _order_moves(game, entry[3] if entry is not None else None, killers,
+                                     self._history):
                 subtree = GameTree(move, True)
-                game_after_move = game.copy_and_make_move(move)
+                undo_record = game.make_move_inplace(move)  # take it back after the search
                 # Black is the minimizing player, so choose the least value
-                value = min(value, self._alpha_beta(game_after_move, subtree, depth - 1,
-                                                    alpha, beta))
+                subtree_value = self._alpha_beta(game, subtree, depth - 1, alpha, beta)
+                game.undo_move(undo_record)
+                if subtree_value < value:
+                    value, best_move = subtree_value, move
                 beta = min(beta, value)  # Least score so far
                 tree.add_subtree(subtree)
                 if beta <= alpha:  # Opponent not going to allow this move, see docstring
+                    if undo_record[2] is None:  # Try this quiet move early at the same ply
+                        _update_killers(killers, move)
+                        self._history[move] = self._history.get(move, 0) + depth * depth
                     break  # alpha cutoff
 
-            tree.relative_points = value  # Store value to tree
+        tree.relative_points = value  # Store value to tree
+
+        # Store the result, recording whether it is only a bound because of a cutoff. If the
+        # root window was narrowed during the search, the positions searched after that were
+        # given narrower windows than original_alpha and original_beta (or were not searched at
+        # all), so flag would not describe value correctly, and nothing is stored.
+        if value <= original_alpha:
+            flag = UPPER_BOUND
+        elif value >= original_beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        if _root_window[0] == root_alpha and _root_window[1] == root_beta:
+            _store_transposition(key, depth, flag, value, best_move, tree)
+        return value
+
+    def _null_move_search(self, game: ChessGame, depth: int,
+                          alpha: int, beta: int) -> Optional[int]:
+        """Return the points of game found by null-move pruning if it cuts this search off,
+        and None otherwise.
+
+        Null-move pruning lets the player to move pass the turn, and searches the position
+        with a reduced depth (depth - 1 - NULL_MOVE_REDUCTION) and a minimal window. Making a
+        move is (almost) always better than passing, so if the player is still guaranteed a
+        value that the opponent will not allow (at least beta for red, at most alpha for
+        black) after passing, the opponent will not allow this position either, and it need
+        not be searched with its actual moves.
+
+        The search is only tried if depth >= NULL_MOVE_MIN_DEPTH, and if the player to move
+        still has a chariot, a horse, or a cannon, since passing can be better than moving in
+        endgames where only pawns and defending pieces are left.
+
+        Preconditions:
+            - depth >= 0
+            - Game has not finished
+        """
+        if depth < NULL_MOVE_MIN_DEPTH or not _has_attacking_pieces(game):
+            return None
+
+        undo_record = game.make_null_move()
+        if game.is_red_move():  # Black passed, check whether black can still get <= alpha
+            value = self._alpha_beta(game, GameTree(), depth - 1 - NULL_MOVE_REDUCTION,
+                                     alpha, alpha + 1)
+            cutoff = value <= alpha
+        else:  # Red passed, check whether red can still get >= beta
+            value = self._alpha_beta(game, GameTree(), depth - 1 - NULL_MOVE_REDUCTION,
+                                     beta - 1, beta)
+            cutoff = value >= beta
+        game.undo_null_move(undo_record)
+
+        return value if cutoff else None
+
+    def _quiesce(self, game: ChessGame, alpha: int, beta: int, depth: int) -> int:
+        """Return the points of game after searching only the captures, at most depth moves
+        deep, using the alpha-beta pruning algorithm (see _alpha_beta).
+
+        Evaluating a position in the middle of an exchange of pieces gives a misleading result
+        (e.g. a chariot captures a protected pawn, and the chariot is captured on the next
+        move, beyond the search depth). This is why the leaves of _alpha_beta are evaluated by
+        this method, which keeps searching until no capture is worth making. The player to
+        move can always choose to stop capturing, so the points of the position as it is
+        (the 'stand pat' points) are a bound on the result.
+
+        No GameTree is built for the moves searched by this method.
+
+        Preconditions:
+            - depth >= 0
+        """
+        value = game.get_absolute_points()  # stand pat
+        if depth == 0 or game.get_winner() is not None:
             return value
 
-    def _alpha_beta_multi(self, game: ChessGame, depth: int,
-                          alpha: int, beta: int) -> int:
+        if game.is_red_move():
+            alpha = max(alpha, value)
+            for move in game.get_capture_moves():
+                if alpha >= beta:
+                    break  # beta cutoff
+                undo_record = game.make_move_inplace(move)
+                value = max(value, self._quiesce(game, alpha, beta, depth - 1))
+                game.undo_move(undo_record)
+                alpha = max(alpha, value)
+        else:  # Black's move
+            beta = min(beta, value)
+            for move in game.get_capture_moves():
+                if beta <= alpha:
+                    break  # alpha cutoff
+                undo_record = game.make_move_inplace(move)
+                value = min(value, self._quiesce(game, alpha, beta, depth - 1))
+                game.undo_move(undo_record)
+                beta = min(beta, value)
+
+        return value
+
+    def _alpha_beta_multi(self, game: ChessGame, depth: int, alpha: int, beta: int,
+                          first_move: Optional[str] = None) -> int:
         """The alpha-beta pruning algorithm that is functionally identical to the
         above implementation, except this one uses multiprocessing.
 
         Note: Multiprocessing is the use of two or more central processing units (CPUs)
         within a single computer system.
 
+        We use the 'Young Brothers Wait' strategy: the first possible move (the 'eldest
+        brother') is searched in this process to obtain a bound, and only then are the
+        remaining moves (the 'younger brothers') searched in parallel by the shared process
+        pool (see _get_executor), one task per move. Every task is submitted with the best
+        bound found so far, so the cutoffs found by finished tasks are used by later ones,
+        and the running tasks narrow their windows to it as soon as it is found (see
+        _root_window).
+        The below example illustrate our usage of multiprocessing functions (split the work):
+
+        possible_moves = [ move_1   move_2   move_3   ...   move_x ]
+                             |        |________|______________|
+                       this process     <PROCESSES> workers, at most <PROCESSES> tasks at once
+
+        The moves are searched in the order given by _order_moves, so first_move, if given, is
+        the eldest brother. Like _alpha_beta, this method stops searching once a move is found
+        whose points are outside of the (alpha, beta) window, and then only returns a bound on
+        the points of game; this is only possible if the window given is not the full window.
+
         Warning: Do NOT recurse on this method, recurse on the non-multiprocessing method.
 
         Preconditions:
             - depth > 0
             - Game has not finished
+            - first_move is None or first_move in game.get_valid_moves()
         """
-        processes = []  # Accumulator that keeps track of the processes
-        moves = game.get_valid_moves()
-
-        # Divide the task (total number of moves to search for) into <PROCESSES> pieces, where
-        # the first <PROCESSES - 1> processes search for <per_process> moves, and the
-        # last processes search for <last_process> moves
-        per_process, last_process = divmod(len(moves), PROCESSES - 1)
-        start, end = 0, per_process  # Loop variable for the below for loop, representing
-        # indices of the moves to be searched
-
-        for i in range(PROCESSES):  # Iterate <PROCESSES> times, thus creating <PROCESSES> processes
-            # Create a process, running self._alpha_beta_process, parameters are listed in <args>
-            process = multiprocessing.Process(target=self._alpha_beta_process,
-                                              args=(game, depth, alpha, beta, start, end))
-            processes.append(process)  # Keep track of this process, so we can remove it later
-            process.start()  # Start the process (call self._alpha_beta_process)
-            if i != PROCESSES - 2:  # if it is not the end of the process
-                start, end = end, end + per_process  # Move on to the next indices
-            else:  # until the last process
-                start, end = end, end + last_process  # Last indices (for the last process)
-
-        # Now the multiprocessing work is all done. Stop the processes in the list <processes>
-        for p in processes:
-            p.join()
-
-        # Since self._alpha_beta_process stores its work as xml files, convert them into trees
-        for i in range(len(moves)):
-            subtree = xml_to_tree(f'temp/process{i}.xml')  # store the temp tree
-            self._game_tree.add_subtree(subtree)  # add it as subtree of self._game_tree
-            os.remove(f'temp/process{i}.xml')  # after adding the subtree, remove the xml file
+        executor = _get_executor()
+        moves = _order_moves(game, first_move)
+        is_red = game.is_red_move()
+        subtrees = [None] * len(moves)
+        subtrees[0] = self._search_root_move(game, moves[0], depth, alpha, beta)  # eldest brother
+        alpha, beta = _tighten_window(alpha, beta, subtrees[0].relative_points, is_red)
+
+        pending = {}  # Maps the futures that are not done yet to the index of their move
+        next_index = 1
+        try:
+            # Stop as soon as a move is outside of the window (alpha >= beta): the points of the
+            # game are then only a bound, and the remaining moves cannot change that
+            while alpha < beta and (next_index < len(moves) or pending):
+                # Keep all workers busy, giving every new task the best bound found so far,
+                # and let the running tasks narrow their windows to it too (see _root_window).
+                # The bound is loosened by one point so that the moves that tie with the best
+                # move still get exact points, which make_move needs to break the tie.
+                if is_red:
+                    window = (alpha - 1, beta)
+                else:
+                    window = (alpha, beta + 1)
+                _set_root_window(*window)
+                while next_index < len(moves) and len(pending) < PROCESSES:
+                    future = executor.submit(_search_move, game, moves[next_index], depth,
+                                             *window)
+                    pending[future] = next_index
+                    next_index += 1
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        subtree = future.result()
+                    except _SearchTimeout:
+                        # The other tasks are past the deadline as well, so wait for them to
+                        # stop before the pool is used for another search
+                        for other in pending:
+                            other.cancel()
+                        wait(pending)
+                        raise
+                    subtrees[pending.pop(future)] = subtree
+                    alpha, beta = _tighten_window(alpha, beta, subtree.relative_points, is_red)
+
+            # If the search was cut off, the moves still being searched are not needed
+            for future in pending:
+                future.cancel()
+            wait(pending)
+        finally:
+            _set_root_window(-INFINITY, INFINITY)
+
+        # Add the subtrees in the order of the moves, regardless of which task finished first,
+        # leaving out the moves that were not searched because of a cutoff
+        for subtree in subtrees:
+            if subtree is not None:
+                self._game_tree.add_subtree(subtree)
 
         # determine the root value of the tree, similar to alpha-beta
-        if game.is_red_move():
+        if is_red:
             value = max(s.relative_points for s in self._game_tree.get_subtrees())
         else:
             value = min(s.relative_points for s in self._game_tree.get_subtrees())
         self._game_tree.relative_points = value
         return value
 
-    def _alpha_beta_process(self, game: ChessGame, depth: int,
-                            alpha: int, beta: int, start: int, end: int) -> None:
-        """This helper method will be called PROCESSES number of times, performing
-        the alpha-beta pruning algorithm over multiple processes. After it is finished,
-        store its generated GameTree as xml file, since memory cannot be accessed between processes.
-
-        <start> and <end> represent the range of moves to be searched, where each process
-        is responsible of a certain range (analogous to 'splitting the work')
+    def _search_root_move(self, game: ChessGame, move: str, depth: int,
+                          alpha: int, beta: int) -> GameTree:
+        """Return the GameTree generated by searching the given move from game with alpha-beta
+        pruning, where depth is the depth of the search of game, so the remaining depth after
+        the move is made is depth - 1.
 
-        The below example illustrate our usage of multiprocessing functions (split the work):
-
-        possible_moves = [ move_1   move_2   move_3   move_4   ...   move_x-1   move_x ]
-                             |_________|       |_________|    |___|     |__________|
-                              process_1         process_2      ...    process_<PROCESSES>
+        The killer moves are recorded by ply, so those found by earlier searches of a different
+        depth are still tried at the same distance from the root.
 
         Preconditions:
-            - must be called by _alpha_beta_multi
+            - move in game.get_valid_moves()
+            - depth > 0
         """
-        # Method same as self._alpha_beta, see that method for annotations
-        possible_moves = game.get_valid_moves()
-        if game.is_red_move():
-            value = -1000000
-            for i in range(start, end):  # Only search for moves in the given range
-                move = possible_moves[i]
-                subtree = GameTree(move, False)
-                game_after_move = game.copy_and_make_move(move)
-                value = max(value, self._alpha_beta(game_after_move, subtree, depth - 1,
-                                                    alpha, beta))
-                alpha = max(alpha, value)
+        self._search_depth = depth
+        # Make room for the killer moves of every ply of a deeper search than before
+        self._killers.extend([None, None] for _ in range(len(self._killers), depth + 1))
 
-                # Store the generated tree (since memory cannot be accessed between processes)
-                tree_to_xml(subtree, f'temp/process{i}.xml')
-
-                if alpha >= beta:
-                    break  # beta cutoff
-        else:
-            value = 1000000
-            for i in range(start, end):  # Only search for moves in the given range
-                move = possible_moves[i]
-                subtree = GameTree(move, True)
-                game_after_move = game.copy_and_make_move(move)
-                value = min(value, self._alpha_beta(game_after_move, subtree, depth - 1,
-                                                    alpha, beta))
-                beta = min(beta, value)
-
-                # Store the generated tree (since memory cannot be accessed between processes)
-                tree_to_xml(subtree, f'temp/process{i}.xml')
-
-                if beta <= alpha:
-                    break  # alpha cutoff
+        subtree = GameTree(move, not game.is_red_move())
+        self._alpha_beta(game.copy_and_make_move(move), subtree, depth - 1, alpha, beta)
+        return subtree
 
     def reload_tree(self) -> None:
         """Reload the tree from the xml file as self._game_tree."""
@@ -407,6 +712,271 @@ class ExploringPlayer(Player):
         return self._game_tree
 
 
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the process pool that ExploringPlayer._alpha_beta_multi submits its work to.
+
+    The pool is created the first time it is needed and then shared by all players, so that
+    the worker processes are kept from move to move. The workers share the transposition
+    table of this process.
+    """
+    global _executor
+    if _executor is None:
+        _get_transposition_table()  # Allocate the shared memory before starting the workers
+        _executor = ProcessPoolExecutor(max_workers=PROCESSES, initializer=_init_worker,
+                                        initargs=(_transposition_array, _search_deadline,
+                                                  _root_window))
+    return _executor
+
+
+def _best_subtrees(subtrees: list[GameTree], is_red: bool) -> list[GameTree]:
+    """Return the subtrees whose moves are the best for the given player (red if is_red),
+    which are the moves with the best relative points, then, among those, the highest
+    win probability for the player, then the lowest win probability for the opponent.
+
+    Preconditions:
+        - subtrees != []
+
+    >>> subtrees = [GameTree('a', False, 10, 0.5, 0.1), GameTree('b', False, 10, 0.5, 0.0),
+    ...             GameTree('c', False, 5, 0.9, 0.0), GameTree('d', False, 10, 0.5, 0.0)]
+    >>> [s.move for s in _best_subtrees(subtrees, True)]
+    ['b', 'd']
+    >>> [s.move for s in _best_subtrees(subtrees, False)]
+    ['c']
+    """
+    # Compare the subtrees by a single key, so that the minimum key is the best
+    if is_red:
+        keys = [(-s.relative_points, -s.red_win_probability, s.black_win_probability)
+                for s in subtrees]
+    else:
+        keys = [(s.relative_points, -s.black_win_probability, s.red_win_probability)
+                for s in subtrees]
+    best_key = min(keys)
+    return [s for s, key in zip(subtrees, keys) if key == best_key]
+
+
+def _has_attacking_pieces(game: ChessGame) -> bool:
+    """Return whether the player to move in game has a chariot, a horse, or a cannon left.
+
+    >>> _has_attacking_pieces(ChessGame())
+    True
+    """
+    is_red = game.is_red_move()
+    return any(piece is not None and piece.is_red == is_red and piece.kind in {'r', 'h', 'c'}
+               for row in game.get_board() for piece in row)
+
+
+def _order_moves(game: ChessGame, first_move: Optional[str],
+                 killers: list[Optional[str]] = (),
+                 history: Optional[dict[str, int]] = None) -> list[str]:
+    """Return the valid moves of game in the order they should be searched by alpha-beta.
+
+    first_move (usually the best move found by an earlier search) comes first, if given. Then
+    come the captures, the most valuable victim first and, among those, the least valuable
+    attacker first, then the killers (quiet moves that caused a cutoff in another position
+    at the same ply, see _update_killers) that are valid in game, and lastly all other moves,
+    those that caused the most cutoffs anywhere in the search first if history is given.
+    Alpha-beta prunes the most when the best moves are searched first, and good captures are
+    the moves most likely to be the best.
+
+    >>> game = ChessGame()
+    >>> _order_moves(game, 'h2+3')[:3]
+    ['h2+3', 'c8+7', 'c2+7']
+    >>> _order_moves(game, None, ['h2+3', 'c8+1'])[2:4]
+    ['h2+3', 'c8+1']
+    >>> _order_moves(game, None, [], {'c2.5': 9, 'h8+7': 4})[2:4]
+    ['c2.5', 'h8+7']
+    """
+    captures = game.get_capture_moves()
+    valid_moves = game.get_valid_moves()
+    ordered_moves = [] if first_move is None else [first_move]
+    ordered_moves.extend(move for move in captures if move != first_move)
+    early_moves = set(ordered_moves)
+    for killer in killers:
+        if killer is not None and killer not in early_moves and killer in valid_moves:
+            ordered_moves.append(killer)
+            early_moves.add(killer)
+    quiet_moves = [move for move in valid_moves if move not in early_moves]
+    if history:  # sort is stable, so moves that never caused a cutoff keep their order
+        quiet_moves.sort(key=lambda move: history.get(move, 0), reverse=True)
+    ordered_moves.extend(quiet_moves)
+    return ordered_moves
+
+
+def _update_killers(killers: list[Optional[str]], move: str) -> None:
+    """Record move as the most recent killer move in killers, the killer moves of a ply,
+    forgetting the oldest one.
+
+    >>> killers = [None, None]
+    >>> _update_killers(killers, 'h2+3')
+    >>> _update_killers(killers, 'c8+1')
+    >>> _update_killers(killers, 'c8+1')
+    >>> killers
+    ['c8+1', 'h2+3']
+    """
+    if killers[0] != move:
+        killers[1] = killers[0]
+        killers[0] = move
+
+
+def _tighten_window(alpha: int, beta: int, value: int, is_red: bool) -> tuple[int, int]:
+    """Return the (alpha, beta) window after a move of the given value has been searched,
+    where is_red is whether red (the maximizer) is the one to make the move.
+
+    >>> _tighten_window(-1000000, 1000000, 30, True)
+    (30, 1000000)
+    >>> _tighten_window(-1000000, 50, 30, False)
+    (-1000000, 30)
+    >>> _tighten_window(40, 1000000, 30, True)
+    (40, 1000000)
+    """
+    if is_red:
+        return max(alpha, value), beta
+    else:
+        return alpha, min(beta, value)
+
+
+def _search_move(game: ChessGame, move: str, depth: int, alpha: int, beta: int) -> GameTree:
+    """Return the GameTree generated by searching the given move from game with alpha-beta
+    pruning, where depth is the depth of the search of game, so the remaining depth after
+    the move is made is depth - 1.
+
+    This function is run by the worker processes of _get_executor(), and the returned
+    GameTree is pickled back to the main process. Every process searches with one
+    ExploringPlayer (_worker_explorer), so that its killer moves and history are kept from
+    root move to root move and from search to search.
+
+    Preconditions:
+        - move in game.get_valid_moves()
+        - depth > 0
+    """
+    global _worker_explorer
+    if _worker_explorer is None:
+        _worker_explorer = ExploringPlayer(depth)
+    return _worker_explorer._search_root_move(game, move, depth, alpha, beta)
+
+
+def _get_transposition_table() -> memoryview:
+    """Return the transposition table, allocating its shared memory (and that of the search
+    deadline and the root window) the first time this function is called, unless this is a
+    worker process, see _init_worker.
+    """
+    if _transposition_table is None:
+        _init_worker(multiprocessing.RawArray('B', TRANSPOSITION_TABLE_SIZE * _TT_SLOT_SIZE),
+                     multiprocessing.RawValue('d', 0),
+                     multiprocessing.RawArray('i', [-INFINITY, INFINITY]))
+    return _transposition_table
+
+
+def _set_search_deadline(deadline: float) -> None:
+    """Make every running search stop at deadline, given as a time.time() value, or let the
+    searches run to the end if deadline is 0.
+    """
+    _get_transposition_table()  # Allocate the shared memory
+    _search_deadline.value = deadline
+
+
+def _set_root_window(alpha: int, beta: int) -> None:
+    """Make every running search narrow its windows to (alpha, beta), see _root_window."""
+    _get_transposition_table()  # Allocate the shared memory
+    _root_window[0], _root_window[1] = alpha, beta
+
+
+def _init_worker(transposition_array: multiprocessing.Array,
+                 search_deadline: multiprocessing.Value,
+                 root_window: multiprocessing.Array) -> None:
+    """Use the shared memory transposition_array as the transposition table of this process,
+    search_deadline as the deadline of its searches, and root_window as the window of the
+    root search.
+
+    This function is also run by every worker process of _get_executor() when it starts, so
+    that all processes share the same transposition table, deadline and root window.
+    """
+    global _transposition_array, _transposition_table, _search_deadline, _root_window
+    _transposition_array = transposition_array
+    _transposition_table = memoryview(transposition_array).cast('B')
+    _search_deadline = search_deadline
+    _root_window = root_window
+
+
+def _probe_transposition(key: int) -> Optional[tuple[int, int, int, Optional[str], float, float]]:
+    """Return the transposition table entry
+    (depth, flag, value, best_move, red_win_probability, black_win_probability)
+    of the position with Zobrist hash key, or None if the position is not in the table.
+
+    >>> _probe_transposition(12345) is None
+    True
+    >>> tree = GameTree('c2.5', False, 0, 0.5, 0.25)
+    >>> _store_transposition(12345, 2, LOWER_BOUND, 30, 'h8+7', tree)
+    >>> _probe_transposition(12345)
+    (2, 1, 30, 'h8+7', 0.5, 0.25)
+    """
+    table = _get_transposition_table()
+    offset = (key & (TRANSPOSITION_TABLE_SIZE - 1)) * _TT_SLOT_SIZE
+    check = _TT_CHECK.unpack_from(table, offset)[0]
+    packed_entry = table[offset + _TT_CHECK.size:offset + _TT_CHECK.size + _TT_ENTRY.size]
+    if check ^ zlib.crc32(packed_entry) != key:
+        return None  # This slot is empty, or holds another position
+
+    value, best_move, depth, flag, red_probability, black_probability = \
+        _TT_ENTRY.unpack(packed_entry)
+    return (depth, flag, value, best_move.rstrip(b'\0').decode() or None,
+            red_probability, black_probability)
+
+
+def _seed_transposition_table(tree: GameTree, game: ChessGame, depth: int) -> None:
+    """Store the best move of every position in the first <depth> moves of tree in the
+    transposition table, where tree is a stored GameTree whose root represents the state of
+    game, and the best move of a position is its move with the highest win probability for
+    the player to move.
+
+    The stored entries have a depth of -1, so that they are only used to order the moves of a
+    search (see _order_moves), and never to cut it off: the points in a stored tree are not
+    the results of a search. Entries from actual searches are never overwritten.
+
+    Preconditions:
+        - depth >= 0
+    """
+    subtrees = tree.get_subtrees()
+    if depth == 0 or subtrees == [] or game.get_winner() is not None:
+        return
+
+    valid_moves = game.get_valid_moves()
+    if game.is_red_move():
+        best_subtree = max(subtrees, key=attrgetter('red_win_probability'))
+    else:
+        best_subtree = max(subtrees, key=attrgetter('black_win_probability'))
+    if best_subtree.move.lower() in valid_moves:  # stored moves may be upper-case
+        _store_transposition(game.get_zobrist_hash(), -1, EXACT, 0, best_subtree.move.lower(),
+                             tree)
+
+    for subtree in subtrees:
+        move = subtree.move.lower()
+        if move in valid_moves:
+            undo_record = game.make_move_inplace(move)
+            _seed_transposition_table(subtree, game, depth - 1)
+            game.undo_move(undo_record)
+
+
+def _store_transposition(key: int, depth: int, flag: int, value: int,
+                         best_move: Optional[str], tree: GameTree) -> None:
+    """Store the search result of the position with Zobrist hash key in the transposition table,
+    together with the win probabilities of tree, the GameTree built for that position.
+
+    An existing entry for the same position is only replaced by a result that was searched
+    at least as deep.
+    """
+    entry = _probe_transposition(key)
+    if entry is not None and entry[0] > depth:
+        return
+
+    packed_entry = _TT_ENTRY.pack(value, (best_move or '').encode(), depth, flag,
+                                  tree.red_win_probability, tree.black_win_probability)
+    offset = (key & (TRANSPOSITION_TABLE_SIZE - 1)) * _TT_SLOT_SIZE
+    table = _get_transposition_table()
+    _TT_CHECK.pack_into(table, offset, key ^ zlib.crc32(packed_entry))
+    table[offset + _TT_CHECK.size:offset + _TT_CHECK.size + _TT_ENTRY.size] = packed_entry
+
+
 class LearningPlayer(Player):
     """A Chinese Chess player that can play based on a game tree and also explore new moves.
 
@@ -424,7 +994,10 @@ class LearningPlayer(Player):
     Representation Invariants:
         - self.depth > 0
     """
+    # Private Instance Attributes:
+    #   - _explorer: the ExploringPlayer used when this player explores new moves
     depth: int
+    _explorer: ExploringPlayer
 
     def __init__(self, depth: int, xml_file: str) -> None:
         """Initialize this player.
@@ -435,6 +1008,7 @@ class LearningPlayer(Player):
         """
         self.depth = depth
         self.xml_file = xml_file
+        self._explorer = ExploringPlayer(depth)
         self.reload_tree()
 
     def make_move(self, game: ChessGame, previous_move: Optional[str]) -> str:
@@ -460,13 +1034,9 @@ class LearningPlayer(Player):
                 if self._game_tree.red_win_probability > EPSILON:
                     # the best move reaches our expectation and thus
                     # the player will find the best move in subtrees
-                    subtrees = self._game_tree.get_subtrees()
-                    # list of red win probabilities corresponding to subtrees
-                    subtrees_win_prob_red = [sub.red_win_probability for sub in subtrees]
-                    maximum_index = subtrees_win_prob_red.index(self._game_tree.red_win_probability)
-                    max_subtree = subtrees[maximum_index]
-                    # update the game tree
-                    self._game_tree = max_subtree
+                    # (the first one if there are ties)
+                    self._game_tree = max(self._game_tree.get_subtrees(),
+                                          key=attrgetter('red_win_probability'))
                     return self._game_tree.move
                 else:  # self._game_tree.red_win_probability <= EPSILON
                     # the player needs to explore locally optimal moves
@@ -475,12 +1045,8 @@ class LearningPlayer(Player):
             else:  # if playing as black
                 # similar to the previous case
                 if self._game_tree.black_win_probability > EPSILON:
-                    subtrees = self._game_tree.get_subtrees()
-                    subtrees_win_prob_black = [sub.black_win_probability for sub in subtrees]
-                    maximum_index = subtrees_win_prob_black.index(
-                        self._game_tree.black_win_probability)
-                    max_subtree = subtrees[maximum_index]
-                    self._game_tree = max_subtree
+                    self._game_tree = max(self._game_tree.get_subtrees(),
+                                          key=attrgetter('black_win_probability'))
                     return self._game_tree.move
                 else:
                     return self._change_to_explore(game, previous_move)
@@ -491,21 +1057,21 @@ class LearningPlayer(Player):
 
         Note: The depth for ExploringPlayer is the same as self.depth.
         """
-        # initialize an exploring player
-        explore = ExploringPlayer(self.depth)
-        move = explore.make_move(game, previous_move)
+        move = self._explorer.make_move(game, previous_move)
         if self._game_tree is None:
-            self._game_tree = explore.get_two_depth_tree()
+            self._game_tree = self._explorer.get_two_depth_tree()
         else:
-            self._game_tree.merge_with(explore.get_two_depth_tree())
+            self._game_tree.merge_with(self._explorer.get_two_depth_tree())
         return move
 
     def reload_tree(self) -> None:
         """Reload the tree from the xml file as self._game_tree."""
         try:
-            self._game_tree = xml_to_tree(self.xml_file)
+            self._game_tree = load_tree(self.xml_file)
         except FileNotFoundError:
             self._game_tree = GameTree()
+        # Let the searches of this player try the moves known from the tree first
+        _seed_transposition_table(self._game_tree, ChessGame(), OPENING_DEPTH)
 
     def get_tree(self) -> GameTree:
         """Return self._game_tree."""
@@ -517,9 +1083,10 @@ class Human(Player):
 
     def make_move(self, game: ChessGame, previous_move: Optional[str]) -> str:
         """Make a move based on the input."""
+        valid_moves = set(game.get_valid_moves())
         print('Please make your move: ')
         move = input()
-        while move not in game.get_valid_moves():
+        while move not in valid_moves:
             print('Invalid move.')
             print('Please make your move: ')
             move = input()
@@ -543,6 +1110,7 @@ class AIBlack(Player):
     # Private Instance Attributes:
     #   - _current_tree: the GameTree consisting of all moves searched by this player
     #   - _current_subtree: offspring of _current_tree that keeps track of the current game move
+    #   - _explorer: the ExploringPlayer used when there is no existing move to choose from
     #
     # Private Representation Invariants:
     #   - self._current_tree is not None
@@ -572,6 +1140,7 @@ class AIBlack(Player):
     depth: int
     _current_tree: GameTree
     _current_subtree: GameTree
+    _explorer: ExploringPlayer
 
     def __init__(self, xml_file: str, depth: int) -> None:
         """Initialize this player.
@@ -583,6 +1152,7 @@ class AIBlack(Player):
         self.depth = depth
         self._current_tree = GameTree()
         self._current_subtree = self._current_tree
+        self._explorer = ExploringPlayer(depth)
 
         self.reload_tree()
 
@@ -594,9 +1164,8 @@ class AIBlack(Player):
         if self._game_tree is None or self._game_tree.get_subtrees() == []:
             # there is no existing possible moves in self._game_tree
             # use exploring player
-            explorer = ExploringPlayer(self.depth)
-            move = explorer.make_move(game, previous_move)
-            new_subtree = explorer.get_tree()
+            move = self._explorer.make_move(game, previous_move)
+            new_subtree = self._explorer.get_tree()
             # add the new tree explored two self._current_subtree
             self._current_subtree.add_subtree(new_subtree)  # see illustration in docstring
             # update self._current_subtree to trace the previous move
@@ -604,21 +1173,10 @@ class AIBlack(Player):
             return move
         else:  # there is possible moves to choose from self._game_tree
             new_subtree = GameTree(previous_move, False)
-            subtrees = self._game_tree.get_subtrees()
-
-            # Obtain subtrees with the lowest point
-            min_point = min(s.relative_points for s in subtrees)
-            candidate_subtrees = [s for s in subtrees if s.relative_points == min_point]
-
-            # Obtain subtrees with the highest self win probability
-            max_probability = max(s.black_win_probability for s in candidate_subtrees)
-            candidate_subtrees = [s for s in candidate_subtrees
-                                  if s.black_win_probability == max_probability]
 
-            # Obtain subtrees with the lowest opponent win probability
-            min_probability = min(s.red_win_probability for s in candidate_subtrees)
-            candidate_subtrees = [s for s in candidate_subtrees
-                                  if s.red_win_probability == min_probability]
+            # Obtain subtrees with the lowest point, then the highest self win probability,
+            # then the lowest opponent win probability
+            candidate_subtrees = _best_subtrees(self._game_tree.get_subtrees(), False)
 
             # If there are still ties, choose one in random
             chosen_subtree = random.choice(candidate_subtrees)
@@ -643,15 +1201,17 @@ class AIBlack(Player):
         print('Merging trees...')
         self._game_tree.merge_with(self._current_tree)  # merge
         print('Storing tree...')
-        tree_to_xml(self._game_tree, self.xml_file)  # store the larger tree as xml
+        save_tree(self._game_tree, self.xml_file)  # store the larger tree
         print('Success.')
 
     def reload_tree(self) -> None:
         """Reload the tree from the xml file as self._game_tree."""
         try:
-            self._game_tree = xml_to_tree(self.xml_file)
+            self._game_tree = load_tree(self.xml_file)
         except FileNotFoundError:
             self._game_tree = None  # then work the same as ExploringPlayer
+        else:  # Let the searches of this player try the moves known from the tree first
+            _seed_transposition_table(self._game_tree, ChessGame(), OPENING_DEPTH)
 
 
 if __name__ == '__main__':
@@ -664,7 +1224,8 @@ if __name__ == '__main__':
     # import python_ta
     # python_ta.check_all(config={
     #     'max-line-length': 100,
-    #     'disable': ['E1136', 'E9989', 'E9994', 'E9998', 'W1401', 'R0913', 'R0914'],
+    #     'disable': ['E1136', 'E9989', 'E9994', 'E9998', 'W0603', 'W1401', 'R0913', 'R0914'],
     #     'extra-imports': ['chess_game', 'game_tree', 'game_run',
-    #                       'multiprocessing', 'random', 'os']
+    #                       'concurrent.futures', 'multiprocessing', 'operator', 'random',
+    #                       'struct', 'time', 'zlib']
     # })
@@ -30,11 +30,11 @@ def train_exploring_for_probability(tree_file: str, number: int, depth: int) ->
     will be updated in each round.
 
     Preconditions:
-        - tree_file must be a file generated by the tree_to_xml function
+        - tree_file must be a file generated by the game_tree.save_tree function
         - rounds > 0
         - depth > 0
     """
-    tree = game_tree.xml_to_tree(tree_file)
+    tree = game_tree.load_tree(tree_file)
     for i in range(number):
         print(f'This is {i + 1} simulation')  # to trace how many times it has trained
         game = ChessGame()  # initialize a new chess game
@@ -68,7 +68,7 @@ def train_exploring_for_probability(tree_file: str, number: int, depth: int) ->
             # insert the moves to the tree
             tree.insert_move_sequence(moves_so_far, points_so_far, red_win_probability=1.0)
 
-    game_tree.tree_to_xml(tree, tree_file)
+    game_tree.save_tree(tree, tree_file)
 
 
 def train_exploring_for_points(xml_file: str, number: int, depth: int, turns: int) -> None:
@@ -85,12 +85,12 @@ def train_exploring_for_points(xml_file: str, number: int, depth: int, turns: in
         - turns: The number of turns a game simulates, and also the depth of the generated tree
 
     Preconditions:
-        - tree_file must be a file generated by the tree_to_xml function
+        - xml_file must be a file generated by the game_tree.save_tree function
         - rounds > 0
         - depth > 0
         - turns <= 20
     """
-    tree = game_tree.xml_to_tree(xml_file)
+    tree = game_tree.load_tree(xml_file)
     tree.clean_depth_subtrees(turns)
     for i in range(number):
         print(f'This is {i + 1} simulation')  # to trace how many times it has trained
@@ -120,7 +120,7 @@ def train_exploring_for_points(xml_file: str, number: int, depth: int, turns: in
         # Add the tree of this game to the tree
         tree.merge_with(current_tree)
 
-    game_tree.tree_to_xml(tree, xml_file)
+    game_tree.save_tree(tree, xml_file)
 
 
 def train_black_ai(file: str, depth: int, iterations: int) -> None: